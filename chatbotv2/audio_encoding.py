@@ -0,0 +1,59 @@
+import io
+import soundfile as sf
+
+# Container settings for every format the TTS server can return
+AUDIO_FORMATS = {
+    # Uncompressed PCM, nothing to encode or decode. Best when the client is on the same machine.
+    "wav": {"mimetype": "audio/wav", "format": "WAV", "subtype": "PCM_16"},
+    # Opus in an Ogg container, the smallest payload for short clips
+    "ogg": {"mimetype": "audio/ogg", "format": "OGG", "subtype": "OPUS"},
+    # Slowest to encode, but every browser can play it
+    "mp3": {"mimetype": "audio/mpeg", "format": "MP3", "subtype": "MPEG_LAYER_III"},
+}
+
+class ChunkEncoder:
+    """Encodes consecutive audio chunks into a single container.
+
+    The same encoder is reused for every chunk of a stream, so the container header
+    is written once and the codec state carries over between chunks. Encoded bytes
+    are handed back as soon as the codec produces them.
+    """
+
+    def __init__(self, audio_format, sample_rate):
+        spec = AUDIO_FORMATS[audio_format]
+        self.buffer = io.BytesIO()
+        self.read_pos = 0
+        # WAV headers are patched with the final length on close, so nothing can be sent before then
+        self.streamable = audio_format != "wav"
+        self.file = sf.SoundFile(
+            self.buffer,
+            mode="w",
+            samplerate=sample_rate,
+            channels=1,
+            format=spec["format"],
+            subtype=spec["subtype"],
+        )
+
+    def encode(self, audio):
+        """Encodes one chunk and returns whatever bytes are ready to send."""
+        self.file.write(audio)
+        return self._drain() if self.streamable else b""
+
+    def close(self):
+        """Flushes the encoder and returns the remaining bytes."""
+        self.file.close()
+        return self._drain()
+
+    def _drain(self):
+        # Release the view right away, the BytesIO can't grow while one is held
+        with self.buffer.getbuffer() as view:
+            data = view[self.read_pos:].tobytes()
+        self.read_pos += len(data)
+        return data
+
+def encode_clip(audio, sample_rate, audio_format):
+    """Encodes a complete clip and returns the container bytes."""
+    # Nothing is drained before close, so headers patched on close (WAV length, MP3 Xing frame) are kept
+    encoder = ChunkEncoder(audio_format, sample_rate)
+    encoder.file.write(audio)
+    return encoder.close()
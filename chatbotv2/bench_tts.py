@@ -0,0 +1,103 @@
+import sys
+import time
+from pykokoro import GenerationConfig, KokoroPipeline, PipelineConfig
+from audio_encoding import AUDIO_FORMATS, ChunkEncoder, encode_clip
+
+# Typical lines the overlay speaks: an item announcement, a color commentary line, and a paragraph of advice
+SAMPLE_TEXTS = {
+    "short": "Jinx bought Infinity Edge.",
+    "medium": "What a play! Ahri dashes in, lands the charm and takes down Zed before he can even react.",
+    "long": (
+        "You are ahead in lane, so use that pressure to take plates before the first dragon spawns. "
+        "Ward the enemy jungle entrance on your side of the map and keep track of their jungler. "
+        "When dragon is up, rotate with your support and make sure your team has vision of the pit first. "
+        "If you fall behind, farm safely under tower and wait for your team to group for objectives."
+    ),
+}
+
+ITERATIONS = 20
+SYNTHESIS_ITERATIONS = 5
+
+# The voices the overlay speaks with (see VOICES in frontend/updateGame.js)
+OVERLAY_VOICES = ["am_eric", "af_bella", "bm_george", "af_sarah"]
+
+def build_pipeline():
+    generation = GenerationConfig(pause_mode="manual", speed=1.0, random_seed=42)
+    return KokoroPipeline(PipelineConfig(voice="af_sarah", generation=generation))
+
+def bench_formats(pipeline):
+    """Compares encode time and payload size for every format across the sample texts."""
+    print(f"{'text':<8} {'format':<6} {'audio s':>8} {'encode ms':>10} {'x realtime':>11} {'bytes':>9} {'kbit/s':>8}")
+    for label, text in SAMPLE_TEXTS.items():
+        result = pipeline(text, voice="af_sarah")
+        duration = len(result.audio) / result.sample_rate
+        for audio_format in AUDIO_FORMATS:
+            start = time.perf_counter()
+            for _ in range(ITERATIONS):
+                payload = encode_clip(result.audio, result.sample_rate, audio_format)
+            encode_seconds = (time.perf_counter() - start) / ITERATIONS
+            print(
+                f"{label:<8} {audio_format:<6} {duration:>8.2f} {encode_seconds * 1000:>10.2f} "
+                f"{duration / encode_seconds:>11.0f} {len(payload):>9} {len(payload) * 8 / duration / 1000:>8.1f}"
+            )
+
+def bench_streaming(pipeline, chunk_seconds=0.5):
+    """Measures how long until the first encoded bytes are available when a clip is encoded in chunks."""
+    result = pipeline(SAMPLE_TEXTS["long"], voice="af_sarah")
+    chunk_size = int(result.sample_rate * chunk_seconds)
+    print(f"\n{'format':<6} {'first bytes ms':>15} {'total ms':>9} {'bytes':>9}")
+    for audio_format in AUDIO_FORMATS:
+        encoder = ChunkEncoder(audio_format, result.sample_rate)
+        start = time.perf_counter()
+        first_bytes = None
+        total = 0
+        for offset in range(0, len(result.audio), chunk_size):
+            data = encoder.encode(result.audio[offset:offset + chunk_size])
+            if data and first_bytes is None:
+                first_bytes = time.perf_counter() - start
+            total += len(data)
+        data = encoder.close()
+        total += len(data)
+        elapsed = time.perf_counter() - start
+        if first_bytes is None:
+            first_bytes = elapsed
+        print(f"{audio_format:<6} {first_bytes * 1000:>15.2f} {elapsed * 1000:>9.2f} {total:>9}")
+
+def bench_real_time_factor(pipeline, voices):
+    """Measures synthesis real-time factor (synthesis time / audio duration) per voice and text length.
+
+    An RTF below 1 means audio is produced faster than it plays. Compare runs across machines
+    to size hardware, or across commits to catch regressions.
+    """
+    print(f"{'voice':<12} {'text':<8} {'chars':>6} {'audio s':>8} {'p50 ms':>9} {'max ms':>9} {'rtf':>6}")
+    for voice in voices:
+        # The first call loads the voice, keep it out of the measurement
+        pipeline(SAMPLE_TEXTS["short"], voice=voice)
+        for label, text in SAMPLE_TEXTS.items():
+            timings = []
+            for _ in range(SYNTHESIS_ITERATIONS):
+                start = time.perf_counter()
+                result = pipeline(text, voice=voice)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            median = timings[len(timings) // 2]
+            duration = len(result.audio) / result.sample_rate
+            print(
+                f"{voice:<12} {label:<8} {len(text):>6} {duration:>8.2f} {median * 1000:>9.1f} "
+                f"{timings[-1] * 1000:>9.1f} {median / duration:>6.3f}"
+            )
+
+if __name__ == "__main__":
+    # uv run bench_tts.py [formats|streaming|rtf [voice ...]]
+    mode = sys.argv[1] if len(sys.argv) > 1 else "formats"
+    print("Loading Kokoro pipeline locally...")
+    pipeline = build_pipeline()
+    if mode == "formats":
+        bench_formats(pipeline)
+    elif mode == "streaming":
+        bench_streaming(pipeline)
+    elif mode == "rtf":
+        bench_real_time_factor(pipeline, sys.argv[2:] or OVERLAY_VOICES)
+    else:
+        print(f"Unknown benchmark '{mode}', expected 'formats', 'streaming' or 'rtf'")
+        sys.exit(1)
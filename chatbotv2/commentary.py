@@ -0,0 +1,158 @@
+import base64
+import os
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from instrumentation import REQUEST_ID_HEADER, track_upstream
+
+LLM_SERVER_URL = os.environ.get("LLM_SERVER_URL", "http://127.0.0.1:5002")
+TTS_SERVER_URL = os.environ.get("TTS_SERVER_URL", "http://127.0.0.1:5001")
+LLM_URL = f"{LLM_SERVER_URL}/llm"
+TTS_URL = f"{TTS_SERVER_URL}/tts"
+HYPE_TTS_URL = f"{TTS_SERVER_URL}/hype-tts"
+
+COMMENTARY_EVENTS = {"ChampionKill", "TurretKill", "InhibKilled"}
+COMMENTARY_INSTRUCTIONS = "Write a color commentary sentence for the following League of Legends event. Return only the final text, with no options or explanations."
+# Matches VOICES.COLOR_COMMENTARY in frontend/updateGame.js
+COMMENTARY_VOICE = "hype"
+COMMENTARY_UPDATER = "COLOR_COMMENTARY"
+
+# Clips waiting for a slow subscriber beyond this are dropped rather than piling up
+SUBSCRIBER_QUEUE_SIZE = 32
+# Every /commentary/stream subscriber holds one of server_riot's request threads while connected,
+# so only this many are accepted; SERVER_THREADS in serving.py reserves threads for them
+MAX_SUBSCRIBERS = 4
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def find_champion(game_state, name):
+    """Resolves a Live Client event name (riot ID game name or champion) to a champion name."""
+    for player in game_state.get("allPlayers", []):
+        if name in (player.get("riotIdGameName"), player.get("championName")):
+            return player.get("championName")
+    return None
+
+def describe_event(event, game_state):
+    """Returns the plain description of an event and the champions involved."""
+    killer = find_champion(game_state, event.get("KillerName")) or event.get("KillerName", "Someone")
+    victim = find_champion(game_state, event.get("VictimName"))
+    if event.get("EventName") == "ChampionKill":
+        text = f"{killer} has slain {victim or event.get('VictimName', 'someone')}"
+    else:
+        text = f"{killer} has destroyed a {'turret' if event.get('EventName') == 'TurretKill' else 'inhibitor'}"
+    return text, [c for c in (killer, victim) if c]
+
+def split_sentences(text):
+    return [sentence for sentence in SENTENCE_END.split(text.strip()) if sentence]
+
+class CommentaryPipeline:
+    """Turns new game events into ready-to-play commentary clips, server side.
+
+    For each event the LLM writes a line, the line is split into sentences and every sentence is
+    sent to the TTS server as soon as the line is ready. Clips are pushed to subscribers in event and
+    sentence order, each one as soon as it and everything before it are ready, so synthesis of later
+    sentences and events overlaps with playback of earlier ones.
+    """
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=8))
+        self.llm_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="commentary-llm")
+        self.tts_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="commentary-tts")
+        self.subscribers = set()
+        self.subscribers_lock = threading.Lock()
+        # Futures for each event's clips, in the order the events happened
+        self.pending = queue.Queue()
+        threading.Thread(target=self._publish_in_order, name="commentary-publisher", daemon=True).start()
+
+    def subscribe(self):
+        """Returns a queue that receives every clip, or None if MAX_SUBSCRIBERS are already connected."""
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self.subscribers_lock:
+            if len(self.subscribers) >= MAX_SUBSCRIBERS:
+                return None
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.subscribers_lock:
+            self.subscribers.discard(subscriber)
+
+    def has_subscribers(self):
+        with self.subscribers_lock:
+            return bool(self.subscribers)
+
+    def submit_events(self, events, game_state, request_id=None):
+        """Starts commentary for every new event worth commenting on.
+
+        Returns whether the pipeline took the events. Without subscribers it does nothing and returns False,
+        so the caller knows the overlay has to comment on them itself.
+        """
+        if not self.has_subscribers():
+            return False
+        for event in events:
+            if event.get("EventName") not in COMMENTARY_EVENTS:
+                continue
+            text, champions = describe_event(event, game_state)
+            self.pending.put(self.llm_executor.submit(self._generate, text, champions, request_id))
+        return True
+
+    def _generate(self, text, champions, request_id):
+        """Writes the commentary line and starts synthesizing each of its sentences."""
+        headers = {REQUEST_ID_HEADER: request_id} if request_id else {}
+        line = text
+        try:
+            with track_upstream("commentary_llm"):
+                resp = self.session.get(
+                    LLM_URL,
+                    params={"text": f"{COMMENTARY_INSTRUCTIONS}: {text}", "champions": ",".join(champions)},
+                    headers=headers,
+                    timeout=10,
+                )
+            line = resp.json().get("response") or text
+        except (requests.RequestException, ValueError) as e:
+            # Same fallback as the overlay: speak the plain event description
+            print(f"Commentary LLM request failed: {e}")
+
+        return [(sentence, self.tts_executor.submit(self._synthesize, sentence, headers)) for sentence in split_sentences(line)]
+
+    def _synthesize(self, sentence, headers):
+        url = HYPE_TTS_URL if COMMENTARY_VOICE == "hype" else TTS_URL
+        params = {"text": sentence} if COMMENTARY_VOICE == "hype" else {"text": sentence, "voice": COMMENTARY_VOICE}
+        with track_upstream("commentary_tts"):
+            resp = self.session.get(url, params=params, headers=headers, timeout=30)
+        resp.raise_for_status()
+        return resp.content, resp.headers.get("Content-Type", "audio/mpeg")
+
+    def _publish_in_order(self):
+        while True:
+            event_future = self.pending.get()
+            try:
+                sentences = event_future.result()
+            except Exception as e:
+                print(f"Commentary generation failed: {e}")
+                continue
+            for sentence, clip_future in sentences:
+                try:
+                    audio, mimetype = clip_future.result()
+                except Exception as e:
+                    print(f"Commentary synthesis failed: {e}")
+                    continue
+                self._publish({
+                    "text": sentence,
+                    "updater": COMMENTARY_UPDATER,
+                    "mimetype": mimetype,
+                    "audio": base64.b64encode(audio).decode("ascii"),
+                })
+
+    def _publish(self, clip):
+        with self.subscribers_lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(clip)
+            except queue.Full:
+                print("Dropping commentary clip for a subscriber that is not keeping up")
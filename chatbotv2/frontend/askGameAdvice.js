@@ -1,4 +1,4 @@
-async function askGameAdvice(prompt) {
+async function askGameAdvice(prompt, requestId) {
 
    if (window.leagueAssistSettings.enableGameAdvice === 'none') {
       return '';
@@ -8,7 +8,7 @@ async function askGameAdvice(prompt) {
       // use my local LLM
       try {
          const instructions = 'You are an expert at League of Legends. Here is the state of my current ranked game. Answer in 5 sentences max.'
-         const response = await llmPrompt(instructions, prompt)
+         const response = await llmPrompt(instructions, prompt, undefined, requestId)
          return response;
       } catch(e) {
          console.error(e);
@@ -16,7 +16,7 @@ async function askGameAdvice(prompt) {
    } else {
       // use paid LLM
       try {
-         const response = await fetch(`http://127.0.0.1:5002/league-game?text=${encodeURIComponent(prompt)}`)
+         const response = await fetch(`http://127.0.0.1:5002/league-game?text=${encodeURIComponent(prompt)}${requestIdParam(requestId)}`)
          const data = await response.json();
          return data.response;
       } catch(e) {
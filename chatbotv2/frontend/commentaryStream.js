@@ -0,0 +1,30 @@
+// Color commentary is written and synthesized by server_riot's commentary pipeline and pushed here
+// ready to play, instead of the overlay calling /llm and then /tts itself for every event.
+let commentarySource = null;
+
+function connectCommentaryStream() {
+    if (commentarySource) {
+        return;
+    }
+    commentarySource = new EventSource('http://127.0.0.1:5000/commentary/stream');
+    commentarySource.onerror = () => {
+        // EventSource reconnects by itself after a dropped connection, but gives up for good on an
+        // error response (e.g. 503 when the server has too many subscribers), so drop it and try
+        // again on the next poll
+        if (commentarySource.readyState === EventSource.CLOSED) {
+            commentarySource = null;
+        }
+    };
+    commentarySource.addEventListener('clip', (event) => {
+        const clip = JSON.parse(event.data);
+        const bytes = Uint8Array.from(atob(clip.audio), (c) => c.charCodeAt(0));
+        playAudioClip(clip.text, clip.updater, bytes.buffer);
+    });
+}
+
+function disconnectCommentaryStream() {
+    if (commentarySource) {
+        commentarySource.close();
+        commentarySource = null;
+    }
+}
@@ -1,8 +1,13 @@
-async function llmPrompt(instructions, originalText, champions) {
+// Query parameter that lets the servers trace one commentary line from poll to speech
+function requestIdParam(requestId) {
+    return requestId ? `&request_id=${encodeURIComponent(requestId)}` : '';
+}
+
+async function llmPrompt(instructions, originalText, champions, requestId) {
     try {
         const prompt = `${instructions}: ${originalText}`;
         const championsParam = (champions) ? `&champions=${[...champions].join(',')}` : ''
-        const stylized = await fetch(`http://127.0.0.1:5002/llm?text=${encodeURIComponent(prompt)}${championsParam}`);
+        const stylized = await fetch(`http://127.0.0.1:5002/llm?text=${encodeURIComponent(prompt)}${championsParam}${requestIdParam(requestId)}`);
         const data = await stylized.json();
         if (data.response) {
             return data.response;
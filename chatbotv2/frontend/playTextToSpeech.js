@@ -3,8 +3,8 @@ let globalAudioCtx = null;
 // Global queue to ensure sequential playback across multiple function calls
 let audioQueue = Promise.resolve();
 
-async function playTextToSpeech(text, voice = undefined, updater) {
-  // Initialize or resume the global AudioContext
+// Initialize or resume the global AudioContext
+async function ensureAudioContext() {
   try {
     if (!globalAudioCtx) {
       const AudioContext = window.AudioContext || window.webkitAudioContext;
@@ -16,59 +16,173 @@ async function playTextToSpeech(text, voice = undefined, updater) {
   } catch(e) {
     console.error(e);
   }
+}
 
+function addToChatLog(text, updater) {
   console.log(text);
-  // 3. Add message to chat log
   const el = document.getElementById('chat-log');
   const messageEl = document.createElement('div');
   messageEl.textContent = text + `<br />SOURCE: ${updater}`;
   el.appendChild(messageEl);
   el.scrollTop = el.scrollHeight;
+}
+
+// Plays a decoded clip, resolving only when it finishes playing completely
+function playAudioBuffer(audioBuffer) {
+  return new Promise((resolvePlayback) => {
+    const source = globalAudioCtx.createBufferSource();
+    source.buffer = audioBuffer;
+    source.connect(globalAudioCtx.destination);
+
+    // Update trailing timestamp metrics and unblock the queue when clip completes
+    source.onended = () => {
+      window.leagueAssist.lastSpeechTime = Date.now();
+      resolvePlayback();
+    };
+
+    source.start(0);
+  });
+}
+
+// Plays a URL through an audio element, which starts as soon as the first bytes arrive
+// instead of waiting for the whole clip like decodeAudioData does
+function playStreamingAudio(url) {
+  return new Promise((resolve, reject) => {
+    const audio = new Audio(url);
+    audio.onplaying = () => {
+      window.leagueAssist.lastSpeechTime = Date.now();
+    };
+    audio.onended = () => {
+      window.leagueAssist.lastSpeechTime = Date.now();
+      resolve();
+    };
+    audio.onerror = () => reject(new Error(`Could not play ${url}`));
+    audio.play().catch(reject);
+  });
+}
 
+async function playTextToSpeech(text, voice = undefined, updater, requestId) {
+  await ensureAudioContext();
+  addToChatLog(text, updater);
 
   // Chain this entire playback task to the global queue
   audioQueue = audioQueue.then(async () => {
     try {
-      const voiceParam = voice ? `&voice=${encodeURIComponent(voice)}` : '';
-      const response = await (voice === 'hype' 
-        ? fetch(`http://127.0.0.1:5001/hype-tts?text=${encodeURIComponent(text)}${voiceParam}`) 
-        : fetch(`http://127.0.0.1:5001/tts?text=${encodeURIComponent(text)}${voiceParam}`)
-      );
+      const extraParams = (voice ? `&voice=${encodeURIComponent(voice)}` : '') + requestIdParam(requestId);
+
+      // Hype lines are streamed from fish.audio, so play them while they download
+      if (voice === 'hype') {
+        await playStreamingAudio(`http://127.0.0.1:5001/hype-tts?text=${encodeURIComponent(text)}${extraParams}`);
+        return;
+      }
+
+      const response = await fetch(`http://127.0.0.1:5001/tts?text=${encodeURIComponent(text)}${extraParams}`);
 
       if (!response.ok) throw new Error(`HTTP ${response.status}`);
 
       // Track speech timestamp right before loading
       window.leagueAssist.lastSpeechTime = Date.now();
 
-      // 1. Fetch entire raw binary MP3 payload instead of streaming chunks
       const arrayBuffer = await response.arrayBuffer();
+      const audioBuffer = await globalAudioCtx.decodeAudioData(arrayBuffer);
+      await playAudioBuffer(audioBuffer);
+
+    } catch (error) {
+      console.error('TTS Playback error:', error);
+      // Don't break the global queue if one request fails
+    }
+  });
+
+  // Wait for this item's turn in the queue to complete before finishing the function
+  await audioQueue;
+}
+
+// Plays a clip that was synthesized elsewhere, e.g. one pushed by the commentary stream
+async function playAudioClip(text, updater, arrayBuffer) {
+  await ensureAudioContext();
+  addToChatLog(text, updater);
 
-      // 2. Decode the unified MP3 payload into an AudioBuffer
+  audioQueue = audioQueue.then(async () => {
+    try {
       const audioBuffer = await globalAudioCtx.decodeAudioData(arrayBuffer);
+      window.leagueAssist.lastSpeechTime = Date.now();
+      await playAudioBuffer(audioBuffer);
+    } catch (error) {
+      console.error('TTS Playback error:', error);
+    }
+  });
 
-      // This promise resolves only when this specific MP3 finishes playing completely
-      await new Promise((resolvePlayback) => {
-        // 3. Create, link, and instantiate the buffer source
-        const source = globalAudioCtx.createBufferSource();
-        source.buffer = audioBuffer;
-        source.connect(globalAudioCtx.destination);
+  await audioQueue;
+}
 
-        // 4. Update trailing timestamp metrics and unblock the queue when clip completes
-        source.onended = () => {
-          window.leagueAssist.lastSpeechTime = Date.now();
-          resolvePlayback();
-        };
+// Speaks several [text, voice, updater] items with one request to /tts-batch.
+// The server sends clips back in order, each prefixed with its 4 byte length, and each clip
+// starts playing as soon as it has arrived and the previous one has finished.
+async function playTextToSpeechBatch(items, requestId) {
+  await ensureAudioContext();
+  items.forEach(([text, , updater]) => addToChatLog(text, updater));
 
-        // 5. Fire immediate playback
-        source.start(0);
-      });
+  // Send the request right away so synthesis overlaps with whatever is playing now
+  const responsePromise = fetch(`http://127.0.0.1:5001/tts-batch?format=wav${requestIdParam(requestId)}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json'
+    },
+    body: JSON.stringify({items: items.map(([text, voice]) => ({text, voice}))}),
+  });
 
+  audioQueue = audioQueue.then(async () => {
+    try {
+      const response = await responsePromise;
+      if (!response.ok) throw new Error(`HTTP ${response.status}`);
+
+      window.leagueAssist.lastSpeechTime = Date.now();
+
+      const reader = response.body.getReader();
+      let pending = new Uint8Array(0);
+      let playback = Promise.resolve();
+
+      while (true) {
+        const {done, value} = await reader.read();
+        if (value) {
+          const joined = new Uint8Array(pending.length + value.length);
+          joined.set(pending);
+          joined.set(value, pending.length);
+          pending = joined;
+        }
+
+        // Pull out every clip that has fully arrived
+        while (pending.length >= 4) {
+          const length = new DataView(pending.buffer, pending.byteOffset, 4).getUint32(0);
+          if (pending.length < 4 + length) {
+            break;
+          }
+          const clip = pending.slice(4, 4 + length);
+          pending = pending.slice(4 + length);
+
+          // An empty clip means the server failed to synthesize that item
+          if (length > 0) {
+            const decoded = globalAudioCtx.decodeAudioData(clip.buffer);
+            playback = playback.then(async () => {
+              try {
+                await playAudioBuffer(await decoded);
+              } catch (error) {
+                console.error('TTS Playback error:', error);
+              }
+            });
+          }
+        }
+
+        if (done) {
+          break;
+        }
+      }
+
+      await playback;
     } catch (error) {
       console.error('TTS Playback error:', error);
-      // Don't break the global queue if one request fails
     }
   });
 
-  // Wait for this item's turn in the queue to complete before finishing the function
   await audioQueue;
 }
@@ -39,11 +39,19 @@ async function updateGame(data) {
     ])
 
     tts_prompts.then((texts) => {
-        texts.forEach(([prompt, voice, updater], ind) => {
-            if (prompt && prompt.trim().length > 0) {
-                playTextToSpeech(prompt, voice, updater)
-            }
+        const spoken = texts.filter(([prompt]) => prompt && prompt.trim().length > 0);
+
+        // Hype lines come from fish.audio one at a time, local voices share one batch request
+        const local = spoken.filter(([, voice]) => voice !== 'hype');
+        spoken.filter(([, voice]) => voice === 'hype').forEach(([prompt, voice, updater]) => {
+            playTextToSpeech(prompt, voice, updater, data.requestId)
         });
+
+        if (local.length > 1) {
+            playTextToSpeechBatch(local, data.requestId);
+        } else if (local.length === 1) {
+            playTextToSpeech(...local[0], data.requestId);
+        }
     });
 }
 
@@ -81,7 +89,7 @@ async function periodicGameAdvice(data) {
     const message = data.prompt;
     if (time - window.leagueAssist.lastHype > 300) {
         window.leagueAssist.lastHype = time;
-        const prompt = await askGameAdvice(data.prompt);
+        const prompt = await askGameAdvice(data.prompt, data.requestId);
         return [prompt, VOICES.PERIODIC_GAME_ADVICE, UPDATER.PERIODIC_GAME_ADVICE];
     }
 
@@ -157,6 +165,13 @@ async function objectiveTimers(data) {
 async function colorCommentary(data) {
 
     if (!window.leagueAssistSettings.enableColorCommentary) {
+        disconnectCommentaryStream();
+        return ['', VOICES.COLOR_COMMENTARY, UPDATER.COLOR_COMMENTARY];
+    }
+
+    // When the server pipeline took this poll's events it comments on them and pushes the audio itself
+    connectCommentaryStream();
+    if (data.commentary_handled) {
         return ['', VOICES.COLOR_COMMENTARY, UPDATER.COLOR_COMMENTARY];
     }
 
@@ -170,7 +185,8 @@ async function colorCommentary(data) {
         const content = await llmPrompt(
             "Write a color commentary sentence for the following League of Legends event. Return only the final text, with no options or explanations.",
             text,
-            champs
+            champs,
+            data.requestId
         );
         return content;
     }));
@@ -190,7 +206,9 @@ async function multiKillHype(data) {
             const message = (event.AcingTeam === myTeam) ? "Your team has aced the enemy!" : "The enemy team has aced your team!";
             const content = await llmPrompt(
                 `This is a league of legends game. ${message} Write a hype comment. Return only the final text, with no options or explanations. No emojis.`,
-                ''
+                '',
+                undefined,
+                data.requestId
             );
             return (event.AcingTeam === myTeam ? '[excited][shouting]' : '[depressed]') + content + (event.AcingTeam === myTeam ? ' WHOOOOOO' : '[sobbing]');
         }
@@ -202,7 +220,8 @@ async function multiKillHype(data) {
             const content = await llmPrompt(
                 "The player scored a multi-kill in League of Legends. Write a hype comment. Return only the final text, with no options or explanations. No emojis.",
                 text,
-                new Set([playerChampion])
+                new Set([playerChampion]),
+                data.requestId
             );
 
             return content + `${streak >= 3 ? ' WHOOOOOO' : ''}`;
@@ -226,7 +245,7 @@ async function gameStartHype(data) {
     if (data.gameData.gameTime > 5 && data.gameData.gameTime < 20) {
         window.leagueAssist.gameStartHypeDone = true;
 
-        const text = await llmPrompt('The game has started in League of Legends. Write a hype sentence to encourage the player. Return only the final text, with no options or explanations.', `The player is playing ${playerChampion}.`, new Set([playerChampion]));
+        const text = await llmPrompt('The game has started in League of Legends. Write a hype sentence to encourage the player. Return only the final text, with no options or explanations.', `The player is playing ${playerChampion}.`, new Set([playerChampion]), data.requestId);
 
         const msg = '[excited]' + text + ' [confident] I believe in you ' + playerChampion + '!';
         return  [msg, VOICES.GAME_START_HYPE, UPDATER.GAME_START_HYPE];
@@ -246,7 +265,7 @@ async function doLoadingScreenOverview(data) {
 
         const {championName: myOpp} = data.allPlayers.find((p) => p.position === myRole && p.team !== myTeam)
         const prompt = `I am playing ${myChamp} and my role opponent is ${myOpp}. Give me advice to win this matchup.`
-        const advice = await askGameAdvice(prompt)
+        const advice = await askGameAdvice(prompt, data.requestId)
         return  [advice, VOICES.LOADING_SCREEN_OVERVIEW, UPDATER.LOADING_SCREEN_OVERVIEW];
     }
     return  ['', VOICES.LOADING_SCREEN_OVERVIEW, UPDATER.LOADING_SCREEN_OVERVIEW];
@@ -269,7 +288,7 @@ async function loreMaster(data) {
         window.leagueAssist.lastLore = now;
         const nextInd = window.leagueAssist.nextLoreInd.shift();
         const champion = data.allPlayers[nextInd].championName;
-        const content = await fetch(`http://127.0.0.1:5002/deeplore?champions=${encodeURIComponent(champion)}`, {
+        const content = await fetch(`http://127.0.0.1:5002/deeplore?champions=${encodeURIComponent(champion)}${requestIdParam(data.requestId)}`, {
             method: 'GET',
             headers: {
                 'Content-Type': 'application/json'
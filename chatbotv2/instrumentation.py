@@ -0,0 +1,89 @@
+import time
+import uuid
+from contextlib import contextmanager
+from flask import Response, g, has_request_context, request
+from metrics import gauge, histogram, render_metrics
+
+# Ties one commentary line together across server_riot, server_llm and server_tts.
+# Browsers pass it as a query parameter (a custom header would cost a CORS preflight per call),
+# servers pass it to each other as a header.
+REQUEST_ID_HEADER = "X-Request-ID"
+REQUEST_ID_PARAM = "request_id"
+
+request_seconds = histogram(
+    "http_request_seconds",
+    "Time to handle a request, until the response is ready to send",
+    labels=("service", "route", "method", "status"),
+)
+requests_in_flight = gauge("http_requests_in_flight", "Requests currently being handled", labels=("service", "route"))
+upstream_seconds = histogram(
+    "upstream_request_seconds",
+    "Time spent waiting on an upstream service or model",
+    labels=("service", "upstream", "outcome"),
+)
+
+service_name = "unknown"
+
+def current_request_id():
+    """Returns the request ID of the request being handled, or None outside a request."""
+    if has_request_context():
+        return g.get("request_id")
+    return None
+
+def request_id_headers():
+    """Headers that carry the current request ID on to another chatbotv2 server."""
+    request_id = current_request_id()
+    return {REQUEST_ID_HEADER: request_id} if request_id else {}
+
+@contextmanager
+def track_upstream(upstream):
+    """Times a call to an upstream service (Live Client, Riot, ddragon, an LLM, fish.audio, ...)."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        upstream_seconds.observe(elapsed, service=service_name, upstream=upstream, outcome=outcome)
+        request_id = current_request_id()
+        if request_id:
+            print(f"[{request_id}] {upstream} took {elapsed * 1000:.0f}ms ({outcome})")
+
+def register(app, service):
+    """Adds request timing, in-flight tracking, request ID propagation and /metrics to a Flask app."""
+    global service_name
+    service_name = service
+
+    @app.before_request
+    def start_request():
+        g.request_id = request.headers.get(REQUEST_ID_HEADER) or request.args.get(REQUEST_ID_PARAM) or uuid.uuid4().hex
+        g.request_start = time.perf_counter()
+        g.route = request.url_rule.rule if request.url_rule else "unknown"
+        requests_in_flight.inc(service=service, route=g.route)
+
+    @app.after_request
+    def finish_request(response):
+        if "request_start" in g:
+            request_seconds.observe(
+                time.perf_counter() - g.request_start,
+                service=service,
+                route=g.route,
+                method=request.method,
+                status=response.status_code,
+            )
+            response.headers[REQUEST_ID_HEADER] = g.request_id
+        response.headers["Access-Control-Expose-Headers"] = f"{REQUEST_ID_HEADER}, Server-Timing"
+        return response
+
+    @app.teardown_request
+    def end_request(exc):
+        # Runs even when a view raised, so the gauge can't drift upwards
+        if "route" in g:
+            requests_in_flight.dec(service=service, route=g.route)
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,166 @@
+import argparse
+import threading
+import time
+from collections import defaultdict
+import requests
+from requests.adapters import HTTPAdapter
+from werkzeug.serving import make_server
+
+RIOT_SERVER_URL = "http://127.0.0.1:5000"
+TTS_SERVER_URL = "http://127.0.0.1:5001"
+LLM_SERVER_URL = "http://127.0.0.1:5002"
+
+# Environment for the three servers so every upstream they call is a stand-in from stubs/
+STUB_ENVIRONMENT = {
+    "LIVE_CLIENT_URL": "http://127.0.0.1:2999",
+    "RIOT_API_URL": "http://127.0.0.1:5012",
+    "DDRAGON_URL": "http://127.0.0.1:5013",
+    "GEMINI_BASE_URL": "http://127.0.0.1:5014",
+    "OPENAI_BASE_URL": "http://127.0.0.1:5014/v1",
+    "ANTHROPIC_BASE_URL": "http://127.0.0.1:5014",
+    "FISH_AUDIO_URL": "http://127.0.0.1:5011/v1/tts",
+}
+
+COMMENTARY_EVENTS = {"ChampionKill", "TurretKill", "InhibKilled"}
+
+def run_stubs(recording=None):
+    """Serves every stand-in service from this process until interrupted."""
+    from stubs import ddragon, fish_audio, live_client, llm_providers, riot
+
+    if recording:
+        live_client.game = live_client.RecordedGame(recording)
+
+    servers = []
+    for module in (live_client, riot, ddragon, llm_providers, fish_audio):
+        server = make_server("127.0.0.1", module.PORT, module.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        print(f"Stub {module.__name__} listening on http://127.0.0.1:{module.PORT}")
+
+    print("\nStart the servers with this environment to use the stubs:")
+    for name, value in STUB_ENVIRONMENT.items():
+        print(f"  {name}={value}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
+
+class Stats:
+    """Latencies and failures per endpoint, shared by every simulated client."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def call(self, session, name, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            resp = session.request(method, url, timeout=60, **kwargs)
+            # Count the time to receive the whole body, which is what the overlay waits for
+            resp.content
+            ok = resp.status_code < 400
+        except requests.RequestException:
+            resp, ok = None, False
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            if ok:
+                self.latencies[name].append(elapsed)
+            else:
+                self.errors[name] += 1
+        return resp if ok else None
+
+    def report(self, duration):
+        print(f"\n{'endpoint':<14} {'ok':>7} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        with self.lock:
+            names = sorted(set(self.latencies) | set(self.errors))
+            for name in names:
+                latencies = sorted(self.latencies[name])
+                def percentile(p):
+                    return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0
+                print(
+                    f"{name:<14} {len(latencies):>7} {self.errors[name]:>7} {len(latencies) / duration:>8.1f} "
+                    f"{percentile(0.5):>9.1f} {percentile(0.95):>9.1f} {percentile(0.99):>9.1f} {percentile(1.0):>9.1f}"
+                )
+
+def new_session():
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    return session
+
+def simulate_overlay(stats, stop, poll_seconds):
+    """Does what one browser overlay does: poll the game, then write and speak lines for new events."""
+    session = new_session()
+    while not stop.is_set():
+        poll_start = time.monotonic()
+        resp = stats.call(session, "live_proxy", "GET", f"{RIOT_SERVER_URL}/liveclientdata/allgamedata")
+        if resp is not None:
+            data = resp.json()
+            for event in data.get("new_events", []):
+                if event.get("EventName") not in COMMENTARY_EVENTS:
+                    continue
+                prompt = f"Write a color commentary sentence for the following League of Legends event: {event.get('KillerName')} has slain {event.get('VictimName')}"
+                llm_resp = stats.call(session, "llm", "GET", f"{LLM_SERVER_URL}/llm", params={"text": prompt})
+                line = llm_resp.json().get("response") if llm_resp is not None else None
+                stats.call(session, "tts", "GET", f"{TTS_SERVER_URL}/tts", params={"text": line or prompt, "voice": "am_eric"})
+            for champion, items in data.get("diff", {}).items():
+                if items:
+                    text = f"{champion} bought {', '.join(i['name'] for i in items)}."
+                    stats.call(session, "tts", "GET", f"{TTS_SERVER_URL}/tts", params={"text": text, "voice": "af_bella"})
+        stop.wait(max(0, poll_seconds - (time.monotonic() - poll_start)))
+
+def hammer(stats, stop, target):
+    """Sends back-to-back requests to a single endpoint to find its saturation point."""
+    session = new_session()
+    while not stop.is_set():
+        if target == "live":
+            stats.call(session, "live_proxy", "GET", f"{RIOT_SERVER_URL}/liveclientdata/allgamedata")
+        elif target == "llm":
+            stats.call(session, "llm", "GET", f"{LLM_SERVER_URL}/llm", params={"text": "Write a hype sentence for a League of Legends game."})
+        elif target == "tts":
+            stats.call(session, "tts", "GET", f"{TTS_SERVER_URL}/tts", params={"text": "Jinx has slain Ahri with a perfectly timed rocket.", "voice": "am_eric"})
+        elif target == "lookup":
+            stats.call(session, "lookup", "GET", f"{RIOT_SERVER_URL}/lookup-summoner", params={"summonerName": "Player1#STUB"})
+
+def run_load(target, clients, duration, poll_seconds):
+    stats = Stats()
+    stop = threading.Event()
+    if target == "overlay":
+        workers = [threading.Thread(target=simulate_overlay, args=(stats, stop, poll_seconds)) for _ in range(clients)]
+    else:
+        workers = [threading.Thread(target=hammer, args=(stats, stop, target)) for _ in range(clients)]
+
+    print(f"Running {clients} {target} client(s) for {duration}s...")
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    try:
+        time.sleep(duration)
+    except KeyboardInterrupt:
+        pass
+    stop.set()
+    for worker in workers:
+        worker.join()
+    stats.report(time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline load tests for the chatbotv2 servers")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stubs_parser = commands.add_parser("stubs", help="serve stand-ins for the Live Client, Riot, ddragon, cloud LLMs and fish.audio")
+    stubs_parser.add_argument("--recording", help="JSON list of allgamedata snapshots to replay instead of a synthetic game")
+
+    run_parser = commands.add_parser("run", help="generate load against running servers")
+    run_parser.add_argument("--target", choices=["overlay", "live", "llm", "tts", "lookup"], default="overlay")
+    run_parser.add_argument("--clients", type=int, default=10, help="simulated overlays, or concurrent requests for a single target")
+    run_parser.add_argument("--duration", type=float, default=60, help="seconds to run for")
+    run_parser.add_argument("--poll", type=float, default=5, help="seconds between an overlay's polls, like index.html")
+
+    args = parser.parse_args()
+    if args.command == "stubs":
+        run_stubs(args.recording)
+    else:
+        run_load(args.target, args.clients, args.duration, args.poll)
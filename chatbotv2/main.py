@@ -1,30 +1,150 @@
 import subprocess
 import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 
-scripts = ["server_llm.py", "server_riot.py", "server_tts.py"]
-processes = []
+SERVICES = {
+    "server_llm.py": "http://127.0.0.1:5002/health",
+    "server_riot.py": "http://127.0.0.1:5000/health",
+    "server_tts.py": "http://127.0.0.1:5001/health",
+}
+
+# How often the supervisor checks on the servers
+POLL_SECONDS = 0.25
+# Ready servers get a health check this often, and are restarted after this many failures in a row.
+# Only a refused connection or an error response counts as a failure. A probe that times out means
+# every request thread is busy (e.g. all waiting on the model under load), and restarting then would
+# reload the model and drop every request in flight, so busy servers are left alone.
+HEALTH_CHECK_SECONDS = 5
+HEALTH_CHECK_FAILURES = 3
+PROBE_TIMEOUT_SECONDS = 5
+# The first run of server_llm.py downloads the model, so give startup plenty of time
+STARTUP_TIMEOUT_SECONDS = 900
+# Restart delay doubles after each crash, and resets once a server has stayed up for a while
+RESTART_BACKOFF_SECONDS = 1
+MAX_RESTART_BACKOFF_SECONDS = 60
+STABLE_SECONDS = 120
+
+# Probe results
+HEALTHY, BUSY, DOWN = "healthy", "busy", "down"
+
+def probe(url):
+    try:
+        with urllib.request.urlopen(url, timeout=PROBE_TIMEOUT_SECONDS) as resp:
+            return HEALTHY if resp.status == 200 else DOWN
+    except urllib.error.HTTPError:
+        return DOWN
+    except urllib.error.URLError as e:
+        return BUSY if isinstance(e.reason, TimeoutError) else DOWN
+    except TimeoutError:
+        return BUSY
+    except OSError:
+        return DOWN
+
+class Service:
+    def __init__(self, script, health_url):
+        self.script = script
+        self.health_url = health_url
+        self.process = None
+        self.started_at = None
+        self.ready = False
+        self.restart_at = None
+        self.backoff = RESTART_BACKOFF_SECONDS
+        self.restarts = 0
+        self.health_failures = 0
+        self.last_health_check = 0
+
+    def start(self):
+        self.process = subprocess.Popen(["uv", "run", self.script])
+        self.started_at = time.monotonic()
+        self.ready = False
+        self.restart_at = None
+        self.health_failures = 0
+        print(f"Started {self.script} (PID: {self.process.pid})")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+
+    def schedule_restart(self, reason):
+        self.stop()
+        self.ready = False
+        self.restart_at = time.monotonic() + self.backoff
+        print(f"Warning: {self.script} {reason}, restarting in {self.backoff}s")
+        self.backoff = min(self.backoff * 2, MAX_RESTART_BACKOFF_SECONDS)
+
+    def check(self, result):
+        """Updates the service with the result of its latest probe, or None if it was not probed."""
+        now = time.monotonic()
+
+        if self.restart_at is not None:
+            if now >= self.restart_at:
+                self.restarts += 1
+                self.start()
+            return
+
+        if self.process.poll() is not None:
+            self.schedule_restart(f"stopped with exit code {self.process.returncode}")
+            return
+
+        if not self.ready:
+            if result == HEALTHY:
+                self.ready = True
+                self.last_health_check = now
+                print(f"{self.script} is ready after {now - self.started_at:.1f}s")
+            elif now - self.started_at > STARTUP_TIMEOUT_SECONDS:
+                self.schedule_restart(f"was not ready after {STARTUP_TIMEOUT_SECONDS}s")
+            return
+
+        if result is not None:
+            self.last_health_check = now
+            if result == BUSY:
+                print(f"{self.script} is too busy to answer its health check, leaving it running")
+            else:
+                self.health_failures = 0 if result == HEALTHY else self.health_failures + 1
+            if self.health_failures >= HEALTH_CHECK_FAILURES:
+                self.schedule_restart(f"failed {HEALTH_CHECK_FAILURES} health checks")
+                return
+
+        if now - self.started_at > STABLE_SECONDS:
+            self.backoff = RESTART_BACKOFF_SECONDS
+
+    def needs_probe(self):
+        if self.restart_at is not None or self.process.poll() is not None:
+            return False
+        return not self.ready or time.monotonic() - self.last_health_check >= HEALTH_CHECK_SECONDS
+
+services = [Service(script, url) for script, url in SERVICES.items()]
+prober = ThreadPoolExecutor(max_workers=len(services))
 
 try:
-    # Start all background servers
-    for script in scripts:
-        p = subprocess.Popen(["uv", "run", script])
-        processes.append(p)
-        print(f"Started {script} (PID: {p.pid})")
+    supervisor_start = time.monotonic()
+    # Start all background servers at once, they load their models in parallel
+    for service in services:
+        service.start()
 
-    # Keep the main script alive and monitor the servers
+    all_ready = False
+    # Keep the main script alive and supervise the servers
     while True:
-        for p in processes:
-            if p.poll() is not None:
-                print(f"Warning: A server stopped with exit code {p.returncode}")
-        time.sleep(1)
+        probes = {service: prober.submit(probe, service.health_url) for service in services if service.needs_probe()}
+        for service in services:
+            service.check(probes[service].result() if service in probes else None)
+
+        if not all_ready and all(service.ready for service in services):
+            all_ready = True
+            print(f"All servers ready after {time.monotonic() - supervisor_start:.1f}s")
+        elif all_ready and not all(service.ready for service in services):
+            all_ready = False
+
+        time.sleep(POLL_SECONDS)
 
 except KeyboardInterrupt:
     print("\nStopping all servers...")
 
 finally:
     # This guarantees all servers are killed when you press Ctrl+C
-    for p in processes:
-        if p.poll() is None:  # If still running
-            p.terminate()     # Send SIGTERM
-            
+    for service in services:
+        service.stop()
+
     print("All servers stopped.")
@@ -0,0 +1,91 @@
+import bisect
+import threading
+
+# Seconds, from a cache hit up to a slow paragraph of synthesis
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+registry = []
+
+class Histogram:
+    """A labelled histogram rendered in the Prometheus text format."""
+
+    def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts, total = self.series.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self.series[key] = (counts, total + value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self.series.items()}
+        for key, (counts, total) in sorted(series.items()):
+            label_pairs = [f'{label}="{value}"' for label, value in zip(self.labels, key)]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = ",".join(label_pairs + [f'le="{le}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = f"{{{','.join(label_pairs)}}}" if label_pairs else ""
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+class Gauge:
+    """A labelled gauge rendered in the Prometheus text format."""
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} gauge"]
+        with self.lock:
+            series = dict(self.series)
+        for key, value in sorted(series.items()):
+            label_pairs = ",".join(f'{label}="{label_value}"' for label, label_value in zip(self.labels, key))
+            suffix = f"{{{label_pairs}}}" if label_pairs else ""
+            lines.append(f"{self.name}{suffix} {value}")
+        return lines
+
+def histogram(name, description, labels=(), buckets=DEFAULT_BUCKETS):
+    """Creates a histogram and registers it for /metrics."""
+    metric = Histogram(name, description, labels, buckets)
+    registry.append(metric)
+    return metric
+
+def gauge(name, description, labels=()):
+    """Creates a gauge and registers it for /metrics."""
+    metric = Gauge(name, description, labels)
+    registry.append(metric)
+    return metric
+
+def render_metrics():
+    """Returns every registered metric in the Prometheus text format."""
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
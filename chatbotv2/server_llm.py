@@ -10,6 +10,9 @@ from google import genai
 import requests
 from openai import OpenAI
 from anthropic import Anthropic
+from serving import serve
+import instrumentation
+from instrumentation import track_upstream
 
 MODEL_ID = "google/gemma-2-2b-it"
 LOCAL_MODEL_PATH = "./local_model"
@@ -17,6 +20,11 @@ sentinel_file = os.path.join(LOCAL_MODEL_PATH, "config.json")
 
 CURRENT_PATCH_VERSION = '16.15.1'
 
+# Upstreams can be pointed at the stand-ins in stubs/ for offline load tests (see loadtest.py).
+# The OpenAI and Anthropic clients read OPENAI_BASE_URL and ANTHROPIC_BASE_URL themselves.
+DDRAGON_URL = os.environ.get("DDRAGON_URL", "https://ddragon.leagueoflegends.com")
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL")
+
 # Check if model has already been successfully downloaded 
 if os.path.exists(sentinel_file): 
     print(f"Model already exists locally at '{LOCAL_MODEL_PATH}'. Skipping download.") 
@@ -64,15 +72,18 @@ llm_executor = ThreadPoolExecutor(max_workers=2)
 def run_model_inference(messages, max_new_tokens=256, timeout_seconds=5):
     future = llm_executor.submit(pipe, messages, max_new_tokens=max_new_tokens)
     try:
-        return future.result(timeout=timeout_seconds)
+        with track_upstream('local_llm'):
+            return future.result(timeout=timeout_seconds)
     except TimeoutError:
         future.cancel()
         raise TimeoutError("LLM request timed out after 5 seconds")
 
-# Fetch and store item and champion info
-CHAMPION_DATA = requests.get(f'https://ddragon.leagueoflegends.com/cdn/{CURRENT_PATCH_VERSION}/data/en_US/champion.json').json()["data"]
-
 app = Flask(__name__)
+instrumentation.register(app, 'server_llm')
+
+# Fetch and store item and champion info
+with track_upstream('ddragon'):
+    CHAMPION_DATA = requests.get(f'{DDRAGON_URL}/cdn/{CURRENT_PATCH_VERSION}/data/en_US/champion.json').json()["data"]
 
 # Native Flask hook to inject CORS headers into every response automatically
 @app.after_request
@@ -82,6 +93,11 @@ def add_cors_headers(response):
     response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
     return response
 
+@app.route('/health', methods=['GET'])
+def health():
+    """Readiness probe for main.py, only reachable once startup has finished."""
+    return jsonify({'status': 'ok'})
+
 @app.route('/deeplore', methods=['GET'])
 def query_deeplore():
     raw_value = request.args.get('champions', '')
@@ -97,9 +113,10 @@ def query_deeplore():
         return jsonify({'error': 'Invalid champion name after formatting'}), 400
 
     print(formatted_name)
-    lore_url = f'https://ddragon.leagueoflegends.com/cdn/{CURRENT_PATCH_VERSION}/data/en_US/champion/{formatted_name}.json'
+    lore_url = f'{DDRAGON_URL}/cdn/{CURRENT_PATCH_VERSION}/data/en_US/champion/{formatted_name}.json'
     print(f"Fetching lore for champion: {formatted_name} from {lore_url}")
-    lore = requests.get(lore_url).json()["data"][formatted_name]["lore"]
+    with track_upstream('ddragon'):
+        lore = requests.get(lore_url).json()["data"][formatted_name]["lore"]
 
     if not lore:
         return jsonify({'error': f'No lore found for champion {formatted_name}'}), 404
@@ -171,7 +188,7 @@ with open("credentials.json", "r") as file:
   openai_api_key = data.get("openAiApiKey")
   anthropic_api_key = data.get("anthropicApiKey")
 
-g_client = genai.Client(api_key=g_api_key)
+g_client = genai.Client(api_key=g_api_key, http_options={'base_url': GEMINI_BASE_URL} if GEMINI_BASE_URL else None)
 gemini_model = 'gemini-3.6-flash'
 
 openai_client = OpenAI(api_key=openai_api_key)
@@ -198,10 +215,11 @@ def query_llm_league():
 
     # gemini
     try:
-        response = g_client.models.generate_content(
-            model=gemini_model,
-            contents=instructions + current_game_state,
-        )
+        with track_upstream('gemini'):
+            response = g_client.models.generate_content(
+                model=gemini_model,
+                contents=instructions + current_game_state,
+            )
 
         return jsonify({
             'query': current_game_state,
@@ -216,12 +234,13 @@ def query_llm_league():
         messages_input = [
             {"role": "user", "content": current_game_state}
         ]
-        response = openai_client.responses.create(
-            model=openai_model,
-            instructions=instructions,
-            input=messages_input,
-            max_output_tokens=1000
-        )
+        with track_upstream('openai'):
+            response = openai_client.responses.create(
+                model=openai_model,
+                instructions=instructions,
+                input=messages_input,
+                max_output_tokens=1000
+            )
         return jsonify({
             'query': current_game_state,
             'response': response.output_text,
@@ -235,11 +254,12 @@ def query_llm_league():
         messages_input = [
             {"role": "user", "content": instructions + current_game_state}
         ]
-        response = anthropic_client.messages.create(
-            model=anthropic_model,
-            messages=messages_input,
-            max_tokens=1000
-        )
+        with track_upstream('anthropic'):
+            response = anthropic_client.messages.create(
+                model=anthropic_model,
+                messages=messages_input,
+                max_tokens=1000
+            )
         return jsonify({
             'query': current_game_state,
             'response': response.output_text,
@@ -252,5 +272,5 @@ def query_llm_league():
 
 
 if __name__ == '__main__':
-    # Set debug=False in production environments
-    app.run(host='127.0.0.1', port=5002, debug=True)
+    # Set CHATBOT_DEV=1 to use Flask's development server instead
+    serve(app, 'server_llm', port=5002)
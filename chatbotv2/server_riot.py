@@ -1,8 +1,14 @@
+import os
+import queue
 import threading
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 import requests
 import json
 from collections import Counter
+from serving import serve
+import instrumentation
+from instrumentation import track_upstream
+from commentary import MAX_SUBSCRIBERS, CommentaryPipeline
 
 # Disable self-signed SSL warnings for the local Live Client API
 import urllib3
@@ -10,10 +16,17 @@ import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 app = Flask(__name__)
+instrumentation.register(app, "server_riot")
 
 CURRENT_PATCH_VERSION = '16.15.1'
 
-ITEMS_DATA = requests.get(f'https://ddragon.leagueoflegends.com/cdn/{CURRENT_PATCH_VERSION}/data/en_US/item.json').json()["data"]
+# Upstreams can be pointed at the stand-ins in stubs/ for offline load tests (see loadtest.py)
+LIVE_CLIENT_URL = os.environ.get("LIVE_CLIENT_URL", "https://127.0.0.1:2999")
+RIOT_API_URL = os.environ.get("RIOT_API_URL", "https://americas.api.riotgames.com")
+DDRAGON_URL = os.environ.get("DDRAGON_URL", "https://ddragon.leagueoflegends.com")
+
+with track_upstream("ddragon"):
+  ITEMS_DATA = requests.get(f'{DDRAGON_URL}/cdn/{CURRENT_PATCH_VERSION}/data/en_US/item.json').json()["data"]
 
 # Native Flask hook to inject CORS headers into every response automatically
 @app.after_request
@@ -32,6 +45,9 @@ with open("credentials.json", "r") as file:
 
 cache_lock = threading.Lock()
 
+# Generates color commentary audio for new events and pushes it to /commentary/stream subscribers
+commentary = CommentaryPipeline()
+
 # 2. Your global variable
 GLOBAL_CACHE = {"last_live_state": None}
 
@@ -139,12 +155,18 @@ def get_new_items_live_api(newState):
     return result
 
 
+@app.route("/health", methods=["GET"])
+def health():
+  """Readiness probe for main.py, only reachable once startup has finished."""
+  return jsonify({"status": "ok"})
+
 @app.route("/liveclientdata/allgamedata", methods=["GET"])
 def live_proxy():
   """Proxy endpoint for the local Riot Games Live Client API running on port 2999."""
-  live_api_url = "https://127.0.0.1:2999/liveclientdata/allgamedata"
+  live_api_url = f"{LIVE_CLIENT_URL}/liveclientdata/allgamedata"
   try:
-    response = requests.get(live_api_url, verify=False, timeout=3)
+    with track_upstream("live_client"):
+      response = requests.get(live_api_url, verify=False, timeout=3)
     current_data = response.json()
 
     diff_data = get_new_items_live_api(current_data)
@@ -154,6 +176,11 @@ def live_proxy():
     with cache_lock:
         GLOBAL_CACHE["last_live_state"] = current_data
 
+    # Decided here rather than by the overlay checking its own stream, which can connect between this
+    # call and the check and leave the poll's events with no commentary from either side
+    commentary_handled = commentary.submit_events(new_events_data, current_data, g.request_id)
+
+    current_data["commentary_handled"] = commentary_handled
     current_data["diff"] = diff_data
     current_data["new_events"] = new_events_data
     current_data["prompt"] = next_game_prompt
@@ -167,6 +194,31 @@ def live_proxy():
         503,
     )
 
+@app.route("/commentary/stream", methods=["GET"])
+def commentary_stream():
+  """Server-sent events stream of ready-to-play color commentary clips for new game events."""
+  subscriber = commentary.subscribe()
+  if subscriber is None:
+    # The overlay generates commentary itself when it cannot connect
+    return {"error": f"Too many commentary subscribers (at most {MAX_SUBSCRIBERS})"}, 503
+
+  def stream_clips():
+    try:
+      yield ": connected\n\n"
+      while True:
+        try:
+          # Short enough that a thread held by a disconnected client is noticed and freed quickly
+          clip = subscriber.get(timeout=5)
+        except queue.Empty:
+          # Keeps the connection from being closed as idle between events
+          yield ": keep-alive\n\n"
+          continue
+        yield f"event: clip\ndata: {json.dumps(clip)}\n\n"
+    finally:
+      commentary.unsubscribe(subscriber)
+
+  return Response(stream_clips(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @app.route("/lookup-summoner", methods=["GET"])
 def lookup_summoner():
   """Endpoint that accepts a summonerName query parameter and fetches match history."""
@@ -187,8 +239,9 @@ def lookup_summoner():
 
   try:
       # 1. Resolve PUUID via Riot Account API
-      get_puuid_url = f'https://americas.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}?api_key={api_key}'
-      puuid_resp = requests.get(get_puuid_url, verify=False)
+      get_puuid_url = f'{RIOT_API_URL}/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}?api_key={api_key}'
+      with track_upstream("riot_account"):
+        puuid_resp = requests.get(get_puuid_url, verify=False)
 
       if puuid_resp.status_code != 200:
         return {
@@ -200,8 +253,9 @@ def lookup_summoner():
       if not puuid:
         return {"error": "Unable to resolve player PUUID"}, 404
 
-      match_history_url = f'https://americas.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?start=0&count=10&api_key={api_key}'
-      match_history_resp = requests.get(match_history_url, verify=False)
+      match_history_url = f'{RIOT_API_URL}/lol/match/v5/matches/by-puuid/{puuid}/ids?start=0&count=10&api_key={api_key}'
+      with track_upstream("riot_match_ids"):
+        match_history_resp = requests.get(match_history_url, verify=False)
 
       if match_history_resp.status_code != 200:
         return {
@@ -215,8 +269,9 @@ def lookup_summoner():
       # 3. Fetch Details for individual matches
       match_details = []
       for match_id in match_history_data:
-        match_url = f'https://americas.api.riotgames.com/lol/match/v5/matches/{match_id}?api_key={api_key}'
-        match_resp = requests.get(match_url, verify=False)
+        match_url = f'{RIOT_API_URL}/lol/match/v5/matches/{match_id}?api_key={api_key}'
+        with track_upstream("riot_match"):
+          match_resp = requests.get(match_url, verify=False)
 
         if match_resp.status_code == 200:
           match_details.append(match_resp.json())
@@ -238,4 +293,4 @@ def lookup_summoner():
     return {"error": f"An error occurred while making the request: {e}"}, 500
 
 if __name__ == "__main__":
-  app.run(host="127.0.0.1", port=5000, debug=True)
+  serve(app, "server_riot", port=5000)
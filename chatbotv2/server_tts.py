@@ -1,13 +1,26 @@
 import io
 import json
+import os
+import queue
 import random
+import struct
+import threading
+import time
 import requests
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from flask import Flask, request, Response, stream_with_context, jsonify, send_file
 from pykokoro import GenerationConfig, KokoroPipeline, PipelineConfig
-import soundfile as sf
-import numpy as np
+from requests.adapters import HTTPAdapter
+from audio_encoding import AUDIO_FORMATS, encode_clip
+from metrics import histogram
+import instrumentation
+from instrumentation import track_upstream
+from serving import serve
 
 app = Flask(__name__)
+instrumentation.register(app, 'server_tts')
 
 # Native Flask hook to inject CORS headers into every response automatically
 @app.after_request
@@ -17,6 +30,14 @@ def add_cors_headers(response):
     response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
     return response
 
+@app.after_request
+def track_transfer_time(response):
+    # Flask calls this once the body is ready, the close callback fires once it has been sent
+    ready_at = time.perf_counter()
+    route = request.url_rule.rule if request.url_rule else "unknown"
+    response.call_on_close(lambda: transfer_seconds.observe(time.perf_counter() - ready_at, route=route))
+    return response
+
 # Complete list of all 54 high-quality voices available in Kokoro v1.0
 ALL_VOICES = [
     # American English (am = male, af = female)
@@ -30,21 +51,227 @@ ALL_VOICES = [
     "bm_fable", "bm_george", "bm_lewis",
 ]
 
-print("Loading Kokoro pipeline locally...")
+# Each synthesis worker owns its own KokoroPipeline, so concurrent requests never share model state
+TTS_WORKERS = max(1, min(os.cpu_count() or 1, 4))
+# Requests waiting beyond this are rejected with 503 instead of piling up behind the model
+TTS_QUEUE_SIZE = TTS_WORKERS * 4
+# Seconds a request may wait for a worker before it is abandoned
+TTS_DEADLINE_SECONDS = 20
+# Total size of encoded clips kept in memory for repeated lines
+AUDIO_CACHE_BYTES = 64 * 1024 * 1024
+# Clips up to this many characters are sent as Opus to non-local clients, longer ones as MP3
+SMALL_PAYLOAD_CHARS = 200
+# Load every voice into every worker before serving, so picking a voice mid-game never pays a load cost.
+# When False, each worker loads a voice the first time it is asked for it and keeps it resident.
+PRELOAD_VOICES = True
+VOICE_WARMUP_TEXT = "Ready."
+# A Kokoro v1.0 voice pack is a float32 array of shape (510, 1, 256)
+VOICE_EMBEDDING_BYTES = 510 * 256 * 4
 
 generation = GenerationConfig(
     pause_mode="manual",
     speed=1.0,
     random_seed=42,
 )
-pipeline = KokoroPipeline(PipelineConfig(voice="af_sarah", generation=generation))
+
+class SynthesisBusy(Exception):
+    """Raised when the synthesis queue is full."""
+
+@dataclass
+class SynthesisJob:
+    text: str
+    voice: str | None
+    deadline: float
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.monotonic)
+    queue_seconds: float = 0.0
+    synthesis_seconds: float = 0.0
+
+queue_wait_seconds = histogram("tts_queue_wait_seconds", "Time a synthesis job waited for a free worker")
+synthesis_seconds = histogram("tts_synthesis_seconds", "Time spent inside the Kokoro pipeline", labels=("voice",))
+real_time_factor = histogram(
+    "tts_real_time_factor",
+    "Synthesis time divided by the duration of the audio produced",
+    labels=("voice",),
+    buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.35, 0.5, 0.75, 1.0, 1.5, 2.0),
+)
+encode_seconds = histogram("tts_encode_seconds", "Time to encode a clip, including the wait for an encoder", labels=("format",))
+transfer_seconds = histogram("tts_transfer_seconds", "Time from the response being ready until the client has received it", labels=("route",))
+fish_audio_first_byte_seconds = histogram("fish_audio_first_byte_seconds", "Time from calling fish.audio until its first audio bytes")
+fish_audio_total_seconds = histogram("fish_audio_total_seconds", "Time from calling fish.audio until its last audio bytes")
+
+synthesis_queue = queue.Queue(maxsize=TTS_QUEUE_SIZE)
+
+# voice -> {"workers": names of workers holding the voice, "load_seconds": slowest load across workers}
+resident_voices = {}
+resident_voices_lock = threading.Lock()
+
+def mark_voice_resident(voice, worker_name, load_seconds):
+    with resident_voices_lock:
+        entry = resident_voices.setdefault(voice, {"workers": set(), "load_seconds": 0.0})
+        entry["workers"].add(worker_name)
+        entry["load_seconds"] = max(entry["load_seconds"], load_seconds)
+
+def synthesis_worker(ready):
+    """Loads a pipeline, resolves the ready future (with the error if loading failed), then serves the queue."""
+    worker_name = threading.current_thread().name
+    loaded_voices = set()
+    try:
+        worker_pipeline = KokoroPipeline(PipelineConfig(voice="af_sarah", generation=generation))
+        if PRELOAD_VOICES:
+            for voice in ALL_VOICES:
+                start = time.perf_counter()
+                worker_pipeline(VOICE_WARMUP_TEXT, voice=voice)
+                loaded_voices.add(voice)
+                mark_voice_resident(voice, worker_name, time.perf_counter() - start)
+    except BaseException as e:
+        ready.set_exception(e)
+        return
+    ready.set_result(None)
+    while True:
+        job = synthesis_queue.get()
+        try:
+            # Cancelled jobs (e.g. the rest of a rejected /tts-batch) are skipped. This has to come
+            # first: setting a result or exception on a cancelled future raises InvalidStateError.
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            # The caller has already given up on this job, don't waste the model on it
+            if time.monotonic() > job.deadline:
+                job.future.set_exception(TimeoutError("TTS request expired while queued"))
+                continue
+            job.queue_seconds = time.monotonic() - job.enqueued_at
+            queue_wait_seconds.observe(job.queue_seconds)
+            try:
+                start = time.perf_counter()
+                if job.voice:
+                    result = worker_pipeline(job.text, voice=job.voice)
+                else:
+                    result = worker_pipeline.run(job.text)
+                job.synthesis_seconds = time.perf_counter() - start
+                voice_label = job.voice or "default"
+                synthesis_seconds.observe(job.synthesis_seconds, voice=voice_label)
+                if len(result.audio):
+                    real_time_factor.observe(job.synthesis_seconds / (len(result.audio) / result.sample_rate), voice=voice_label)
+                # The pipeline keeps a voice once it has used it, remember that for /voices
+                if job.voice and job.voice not in loaded_voices:
+                    loaded_voices.add(job.voice)
+                    mark_voice_resident(job.voice, worker_name, job.synthesis_seconds)
+                job.future.set_result(result)
+            except Exception as e:
+                job.future.set_exception(e)
+        except Exception as e:
+            # Nothing may end the worker loop, or the pool would shrink for good
+            print(f"{worker_name} failed to handle a TTS job: {e}")
+        finally:
+            synthesis_queue.task_done()
+
+def submit_synthesis(text, voice=None):
+    """Queues text for the worker pool and returns the job, whose future resolves to the pipeline result."""
+    job = SynthesisJob(text=text, voice=voice, deadline=time.monotonic() + TTS_DEADLINE_SECONDS)
+    try:
+        synthesis_queue.put_nowait(job)
+    except queue.Full:
+        raise SynthesisBusy(f"TTS queue is full ({TTS_QUEUE_SIZE} pending requests)")
+    return job
+
+def synthesize(text, voice=None):
+    """Runs text through the worker pool and blocks until the job is done or the deadline passes.
+
+    Returns the job, with the pipeline result and its queue and synthesis timings.
+    """
+    job = submit_synthesis(text, voice)
+    job.future.result(timeout=max(0, job.deadline - time.monotonic()))
+    return job
+
+# Encoding runs off the request thread and off the synthesis workers, so the model is never idle waiting on an encoder
+encode_executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="encoder")
+
+def encode_result(result, audio_format):
+    """Encodes a pipeline result on the encoder pool."""
+    start = time.perf_counter()
+    audio_bytes = encode_executor.submit(encode_clip, result.audio, result.sample_rate, audio_format).result()
+    encode_seconds.observe(time.perf_counter() - start, format=audio_format)
+    return audio_bytes
+
+def negotiate_format(text):
+    """Picks the response format from the format query parameter, the Accept header, or the client's location."""
+    requested = request.args.get('format')
+    if requested in AUDIO_FORMATS:
+        return requested
+
+    accept = request.headers.get('Accept', '')
+    for audio_format, spec in AUDIO_FORMATS.items():
+        if spec['mimetype'] in accept:
+            return audio_format
+
+    # Same machine: skip compression entirely, bandwidth is free
+    if request.remote_addr in ('127.0.0.1', '::1'):
+        return 'wav'
+    if len(text) <= SMALL_PAYLOAD_CHARS:
+        return 'ogg'
+    return 'mp3'
+
+class AudioCache:
+    """Least recently used cache of encoded clips, bounded by total size in bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.clips = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            clip = self.clips.get(key)
+            if clip is not None:
+                self.clips.move_to_end(key)
+            return clip
+
+    def put(self, key, clip):
+        if len(clip) > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.clips.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self.clips[key] = clip
+            self.size += len(clip)
+            while self.size > self.max_bytes:
+                _, evicted = self.clips.popitem(last=False)
+                self.size -= len(evicted)
+
+audio_cache = AudioCache(AUDIO_CACHE_BYTES)
+
+print(f"Loading {TTS_WORKERS} Kokoro pipeline(s) locally...")
+if PRELOAD_VOICES:
+    print(f"Preloading {len(ALL_VOICES)} voices in each pipeline...")
+
+workers_ready = [Future() for _ in range(TTS_WORKERS)]
+for i, ready in enumerate(workers_ready):
+    threading.Thread(target=synthesis_worker, args=(ready,), name=f"kokoro-{i}", daemon=True).start()
+# Re-raises a worker's startup error here, so the server exits instead of waiting forever
+for ready in workers_ready:
+    ready.result()
 
 fish_audio_api_key = None
+fish_audio_url = "https://api.fish.audio/v1/tts"
 
 # Open and load the JSON file
 with open("credentials.json", "r") as file:
   data = json.load(file)
   fish_audio_api_key = data.get("fishAudioApiKey")
+  # Point this at stubs/fish_audio.py (or set FISH_AUDIO_URL) to test without spending fish.audio credits
+  fish_audio_url = os.environ.get("FISH_AUDIO_URL", data.get("fishAudioUrl", fish_audio_url))
+
+# One pooled keep-alive session, so every hype line after the first skips the TCP and TLS handshake
+fish_session = requests.Session()
+fish_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=8))
+fish_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=8))
+fish_session.headers.update({
+    'Authorization': f'Bearer {fish_audio_api_key}',
+    'Content-Type': 'application/json',
+    'model': 's2.1-pro-free',
+})
 
 
 @app.route('/hype-tts', methods=['GET'])
@@ -52,32 +279,48 @@ def hype_tts():
     text_value = request.args.get('text', '')
     if not text_value:
         return 'Missing text query parameter', 400
+
+    cache_key = ('hype', text_value)
+    cached = audio_cache.get(cache_key)
+    if cached is not None:
+        return send_file(io.BytesIO(cached), mimetype='audio/mpeg')
+
     try:
         print(text_value)
-        r = requests.post(
-            "https://api.fish.audio/v1/tts",
-            headers={
-                'Authorization': f'Bearer {fish_audio_api_key}',
-                'Content-Type': 'application/json',
-                'model': 's2.1-pro-free',
-            },
-            json={
-                'text': text_value,
-                'reference_id': 'e81232c5dea64b309c6cef5931fc455f',
-                'format': 'mp3',
-                'sample_rate': 32000
-            }
-        )
+        upstream_start = time.perf_counter()
+        with track_upstream('fish_audio'):
+            r = fish_session.post(
+                fish_audio_url,
+                json={
+                    'text': text_value,
+                    'reference_id': 'e81232c5dea64b309c6cef5931fc455f',
+                    'format': 'mp3',
+                    'sample_rate': 32000
+                },
+                stream=True,
+                timeout=(3, 30),
+            )
         # Check if the API returned an error status
         if r.status_code != 200:
-            return f'Fish Audio API returned error: {r.text}', r.status_code
-            
-        # 2. Wrap r.content bytes inside an io.BytesIO stream
-        audio_stream = io.BytesIO(r.content)
-        audio_stream.seek(0)
-
-        # 3. Stream the valid MP3 container directly to the browser
-        return send_file(audio_stream, mimetype='audio/mpeg')
+            error_text = r.text
+            r.close()
+            return f'Fish Audio API returned error: {error_text}', r.status_code
+
+        # Pass each upstream chunk straight to the browser, keeping a copy for the cache
+        def stream_audio():
+            chunks = []
+            try:
+                for chunk in r.iter_content(chunk_size=None):
+                    if not chunks:
+                        fish_audio_first_byte_seconds.observe(time.perf_counter() - upstream_start)
+                    chunks.append(chunk)
+                    yield chunk
+                fish_audio_total_seconds.observe(time.perf_counter() - upstream_start)
+                audio_cache.put(cache_key, b''.join(chunks))
+            finally:
+                r.close()
+
+        return Response(stream_with_context(stream_audio()), mimetype='audio/mpeg')
     except Exception as e:
         print(f'Error during TTS generation: {str(e)}')
         return f'TTS generation failed: {str(e)}', 500
@@ -92,39 +335,150 @@ def tts():
     selected_voice = voice_value if voice_value in ALL_VOICES else random.choice(ALL_VOICES)
     print(f'Generating speech for text: {text_value} using voice: {selected_voice}')
     
+    audio_format = negotiate_format(text_value)
+    mimetype = AUDIO_FORMATS[audio_format]['mimetype']
+    cache_key = ('kokoro', text_value, selected_voice, audio_format)
+    cached = audio_cache.get(cache_key)
+    if cached is not None:
+        return send_file(io.BytesIO(cached), mimetype=mimetype)
+
     try:
-        # Run Kokoro pipeline inference
-        result = pipeline(text_value, voice=selected_voice)
-        audio_data = result.audio
-                
-        mp3_io = io.BytesIO()
-        # Encode directly to MP3 format
-        sf.write(mp3_io, audio_data, 24000, format='MP3')
-        mp3_io.seek(0)
-
-        return send_file(mp3_io, mimetype='audio/mpeg')
+        # Run Kokoro pipeline inference on the worker pool
+        job = synthesize(text_value, voice=selected_voice)
+        encode_start = time.perf_counter()
+        audio_bytes = encode_result(job.future.result(), audio_format)
+        encode_time = time.perf_counter() - encode_start
+        audio_cache.put(cache_key, audio_bytes)
+
+        response = send_file(io.BytesIO(audio_bytes), mimetype=mimetype)
+        # Shows the per-stage breakdown in the browser's network panel
+        response.headers['Server-Timing'] = (
+            f'queue;dur={job.queue_seconds * 1000:.1f}, '
+            f'synth;dur={job.synthesis_seconds * 1000:.1f}, '
+            f'encode;dur={encode_time * 1000:.1f}'
+        )
+        return response
+    except SynthesisBusy as e:
+        return f'TTS server is busy: {str(e)}', 503
+    except TimeoutError as e:
+        return f'TTS generation timed out: {str(e)}', 503
     except Exception as e:
         print(f'Error during local TTS generation: {str(e)}')
         return f'TTS generation failed: {str(e)}', 500
 
 
+@app.route('/tts-batch', methods=['POST'])
+def tts_batch():
+    """Synthesizes several {text, voice} items and streams the clips back in order.
+
+    Every clip is sent as a 4 byte big-endian length followed by the encoded audio, as soon as it
+    and every clip before it are ready. A zero length marks an item that failed to synthesize.
+    """
+    body = request.get_json(silent=True) or {}
+    items = body.get('items', []) if isinstance(body, dict) else None
+    if not isinstance(items, list) or not all(isinstance(item, dict) and isinstance(item.get('text', ''), str) for item in items):
+        return 'Items must be a list of {text, voice} objects with string text', 400
+    items = [item for item in items if item.get('text')]
+    if not items:
+        return 'Missing items to synthesize', 400
+    if len(items) > TTS_QUEUE_SIZE:
+        return f'Too many items, at most {TTS_QUEUE_SIZE} per batch', 413
+
+    audio_format = negotiate_format(max((item['text'] for item in items), key=len))
+
+    # Schedule every item in one pass so all workers start on the batch at once.
+    # Kokoro synthesizes one text per call, so the batch is spread across workers rather than fused.
+    clips = []
+    try:
+        for item in items:
+            voice = item.get('voice') if item.get('voice') in ALL_VOICES else random.choice(ALL_VOICES)
+            cache_key = ('kokoro', item['text'], voice, audio_format)
+            cached = audio_cache.get(cache_key)
+            if cached is not None:
+                clips.append((cache_key, cached))
+            else:
+                clips.append((cache_key, submit_synthesis(item['text'], voice)))
+    except SynthesisBusy as e:
+        # Don't leave half a batch behind in the queue
+        for _, clip in clips:
+            if isinstance(clip, SynthesisJob):
+                clip.future.cancel()
+        return f'TTS server is busy: {str(e)}', 503
+
+    print(f'Generating speech for a batch of {len(items)} items')
+
+    def stream_clips():
+        for cache_key, clip in clips:
+            if isinstance(clip, SynthesisJob):
+                try:
+                    result = clip.future.result(timeout=max(0, clip.deadline - time.monotonic()))
+                    clip = encode_result(result, audio_format)
+                    audio_cache.put(cache_key, clip)
+                except Exception as e:
+                    print(f'Error during batch TTS generation: {str(e)}')
+                    clip = b''
+            yield struct.pack('>I', len(clip)) + clip
+
+    return Response(
+        stream_with_context(stream_clips()),
+        mimetype='application/octet-stream',
+        headers={'X-Audio-Mimetype': AUDIO_FORMATS[audio_format]['mimetype']},
+    )
+
+
 @app.route('/tts-wav', methods=['GET'])
 def ttswav():
     text_value = request.args.get('text', '')
     if not text_value:
         return "Missing 'text' query parameter", 400
-    selected_voice = random.choice(ALL_VOICES)
     try:
-        result = pipeline.run(text_value)
-        sf.write("output.wav", result.audio, result.sample_rate)
-        return Response('done')
+        result = synthesize(text_value).future.result()
+        return send_file(io.BytesIO(encode_result(result, 'wav')), mimetype='audio/wav')
+    except SynthesisBusy as e:
+        return f"TTS server is busy: {str(e)}", 503
+    except TimeoutError as e:
+        return f"Audio generation timed out: {str(e)}", 503
     except Exception as e:
         print(f"Error during generation: {str(e)}")
         return f"Audio generation failed: {str(e)}", 500
 
+@app.route('/voices', methods=['GET'])
+def voices():
+    """Reports which voices are loaded in which workers and roughly how much memory they hold."""
+    with resident_voices_lock:
+        snapshot = {voice: (sorted(entry["workers"]), entry["load_seconds"]) for voice, entry in resident_voices.items()}
+
+    voice_list = []
+    total_copies = 0
+    for voice in ALL_VOICES:
+        workers, load_seconds = snapshot.get(voice, ([], None))
+        total_copies += len(workers)
+        voice_list.append({
+            'voice': voice,
+            'resident': len(workers) == TTS_WORKERS,
+            'workers': workers,
+            'load_seconds': load_seconds,
+            'bytes': len(workers) * VOICE_EMBEDDING_BYTES,
+        })
+
+    return jsonify({
+        'preload': PRELOAD_VOICES,
+        'workers': TTS_WORKERS,
+        'resident_count': sum(1 for v in voice_list if v['resident']),
+        'voice_count': len(ALL_VOICES),
+        'bytes_per_voice': VOICE_EMBEDDING_BYTES,
+        'total_bytes': total_copies * VOICE_EMBEDDING_BYTES,
+        'voices': voice_list,
+    })
+
+@app.route('/health', methods=['GET'])
+def health():
+    """Readiness probe for main.py, only reachable once startup has finished."""
+    return jsonify({'status': 'ok'})
+
 @app.route('/get-audio', methods=['GET'])
 def get_audio():
     return send_file('welcome.wav', mimetype='audio/wav')
 
 if __name__ == '__main__':
-    app.run(port=5001, debug=False)
\ No newline at end of file
+    serve(app, 'server_tts', port=5001)
\ No newline at end of file
@@ -0,0 +1,49 @@
+import os
+
+# Request threads per server in production mode. Every server is a single process, so a
+# model-backed server (server_llm, server_tts) holds exactly one copy of its model no matter
+# how many threads serve it. Override with e.g. SERVER_TTS_THREADS=8.
+#
+# A request waiting on a model holds its thread the whole time (up to 15s for /llm, 20s for /tts),
+# and /health waits behind them once every thread is busy. The model servers therefore get more
+# threads than their backends can keep busy, leaving spares for /health and /metrics. main.py also
+# treats a health check that times out as busy rather than failed, so load never triggers a restart.
+SERVER_THREADS = {
+    # 16 for live_proxy and lookups, plus one held by each /commentary/stream subscriber (commentary.MAX_SUBSCRIBERS)
+    "server_riot": 20,
+    # Only two LLM inferences run at once (llm_executor), the rest queue behind them on their threads
+    "server_llm": 16,
+    # At most TTS_WORKERS + TTS_QUEUE_SIZE (20 by default) requests wait on synthesis at once, others get a 503
+    "server_tts": 32,
+}
+# Servers that load a model at import time must never run under the reloader, which imports them twice
+MODEL_SERVERS = {"server_llm", "server_tts"}
+# Idle keep-alive connections from the overlay are kept open this long
+KEEP_ALIVE_SECONDS = 120
+CONNECTION_LIMIT = 200
+
+def serve(app, name, port, host="127.0.0.1"):
+    """Runs a chatbotv2 Flask app.
+
+    Uses waitress, a multi-threaded production WSGI server, unless CHATBOT_DEV=1 is set,
+    in which case Flask's development server is used.
+    """
+    threads = int(os.environ.get(f"{name.upper()}_THREADS", SERVER_THREADS.get(name, 8)))
+
+    if os.environ.get("CHATBOT_DEV") == "1":
+        print(f"Starting {name} on Flask's development server")
+        app.run(host=host, port=port, debug=True, threaded=True, use_reloader=name not in MODEL_SERVERS)
+        return
+
+    from waitress import serve as waitress_serve
+
+    print(f"Starting {name} on waitress with {threads} threads at http://{host}:{port}")
+    waitress_serve(
+        app,
+        host=host,
+        port=port,
+        threads=threads,
+        connection_limit=CONNECTION_LIMIT,
+        channel_timeout=KEEP_ALIVE_SECONDS,
+        ident=name,
+    )
@@ -0,0 +1,34 @@
+import json
+import os
+from flask import Flask, jsonify
+
+# Stand-in for ddragon.leagueoflegends.com, serving the copies of champion.json and item.json
+# kept in league-of-legends/. Run the servers with DDRAGON_URL=http://127.0.0.1:5013.
+app = Flask(__name__)
+PORT = 5013
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "league-of-legends")
+
+with open(os.path.join(DATA_DIR, "champion.json"), "r") as f:
+  CHAMPIONS = json.load(f)
+with open(os.path.join(DATA_DIR, "item.json"), "r") as f:
+  ITEMS = json.load(f)
+
+@app.route("/cdn/<version>/data/en_US/champion.json", methods=["GET"])
+def champions(version):
+  return jsonify(CHAMPIONS)
+
+@app.route("/cdn/<version>/data/en_US/item.json", methods=["GET"])
+def items(version):
+  return jsonify(ITEMS)
+
+@app.route("/cdn/<version>/data/en_US/champion/<name>.json", methods=["GET"])
+def champion(version, name):
+  champ = CHAMPIONS["data"].get(name)
+  if not champ:
+    return jsonify({"error": "not found"}), 404
+  # The real per-champion file has full lore, the blurb is close enough for a load test
+  return jsonify({"data": {name: {**champ, "lore": champ["blurb"]}}})
+
+if __name__ == "__main__":
+  app.run(host="127.0.0.1", port=PORT, threaded=True)
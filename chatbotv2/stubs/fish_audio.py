@@ -0,0 +1,42 @@
+import io
+import os
+import time
+import soundfile as sf
+from flask import Flask, Response, request
+
+# Stand-in for https://api.fish.audio/v1/tts. Set "fishAudioUrl": "http://127.0.0.1:5011/v1/tts"
+# in credentials.json, or FISH_AUDIO_URL, to send /hype-tts here instead.
+app = Flask(__name__)
+PORT = 5011
+
+# Mimic how fish.audio trickles audio back: a delay before the first bytes, then steady chunks
+FIRST_BYTE_DELAY_SECONDS = 0.4
+CHUNK_BYTES = 4096
+CHUNK_DELAY_SECONDS = 0.05
+
+SAMPLE_WAV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "welcome.wav")
+
+# Encode the bundled clip as MP3 once so callers get playable audio that spans many chunks
+samples, sample_rate = sf.read(SAMPLE_WAV)
+mp3 = io.BytesIO()
+sf.write(mp3, samples, sample_rate, format="MP3")
+audio = mp3.getvalue()
+
+@app.route("/v1/tts", methods=["POST"])
+def tts():
+  if not request.headers.get("Authorization", "").startswith("Bearer "):
+    return "Missing bearer token", 401
+  body = request.get_json(silent=True) or {}
+  if not body.get("text"):
+    return "Missing text", 400
+
+  def stream_audio():
+    time.sleep(FIRST_BYTE_DELAY_SECONDS)
+    for offset in range(0, len(audio), CHUNK_BYTES):
+      yield audio[offset:offset + CHUNK_BYTES]
+      time.sleep(CHUNK_DELAY_SECONDS)
+
+  return Response(stream_audio(), mimetype="audio/mpeg")
+
+if __name__ == "__main__":
+  app.run(host="127.0.0.1", port=PORT, threaded=True)
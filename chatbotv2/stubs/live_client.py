@@ -0,0 +1,132 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+from flask import Flask, jsonify
+
+# Stand-in for the League client's Live Client API. Serves plain HTTP, so run server_riot.py with
+# LIVE_CLIENT_URL=http://127.0.0.1:2999. Plays a synthetic game, or replays a recording made of
+# a JSON list of allgamedata snapshots: uv run stubs/live_client.py recording.json
+app = Flask(__name__)
+PORT = 2999
+
+# In-game seconds that pass per real second, so a load test reaches mid-game events quickly
+GAME_SPEED = 10
+
+CHAMPIONS = ["Ahri", "Jinx", "LeeSin", "Thresh", "Darius", "Lux", "Zed", "Vi", "Caitlyn", "Ornn"]
+POSITIONS = ["MIDDLE", "BOTTOM", "JUNGLE", "UTILITY", "TOP"]
+KEYSTONES = ["Electrocute", "Lethal Tempo", "Conqueror", "Aery", "Grasp of the Undying"]
+SPELLS = [("Flash", "Ignite"), ("Flash", "Heal"), ("Flash", "Smite"), ("Flash", "Exhaust"), ("Flash", "Teleport")]
+# Items that exist in the ddragon item.json served by stubs/ddragon.py
+ITEM_IDS = [1001, 1036, 1038, 3006, 3031, 3071, 3089, 3153, 3157, 6672]
+
+ITEM_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "league-of-legends", "item.json")
+with open(ITEM_JSON, "r") as f:
+  ITEM_NAMES = {int(item_id): item["name"] for item_id, item in json.load(f)["data"].items()}
+
+def make_player(index):
+    team = "ORDER" if index < 5 else "CHAOS"
+    game_name = f"Player{index + 1}"
+    return {
+        "championName": CHAMPIONS[index],
+        "riotId": f"{game_name}#STUB",
+        "riotIdGameName": game_name,
+        "summonerName": f"{game_name}#STUB",
+        "team": team,
+        "position": POSITIONS[index % 5],
+        "level": 1,
+        "items": [],
+        "scores": {"kills": 0, "deaths": 0, "assists": 0, "creepScore": 0},
+        "runes": {"keystone": {"displayName": KEYSTONES[index % 5]}},
+        "summonerSpells": {
+            "summonerSpellOne": {"displayName": SPELLS[index % 5][0]},
+            "summonerSpellTwo": {"displayName": SPELLS[index % 5][1]},
+        },
+    }
+
+class SyntheticGame:
+    """A game that advances with wall-clock time: levels, farm, item purchases and kills."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.players = [make_player(i) for i in range(10)]
+        self.events = [{"EventID": 0, "EventName": "GameStart", "EventTime": 0.0}]
+        self.last_tick = 0
+        self.rng = random.Random(42)
+        self.lock = threading.Lock()
+
+    def advance(self):
+        game_time = (time.monotonic() - self.started) * GAME_SPEED
+        with self.lock:
+            # One simulation step per ten in-game seconds
+            while self.last_tick + 10 <= game_time:
+                self.last_tick += 10
+                self.step(self.last_tick)
+            return self.snapshot(game_time)
+
+    def step(self, game_time):
+        for player in self.players:
+            player["scores"]["creepScore"] += self.rng.randint(0, 2)
+            player["level"] = min(18, 1 + int(game_time // 90))
+            if self.rng.random() < 0.03 and len(player["items"]) < 6:
+                item_id = self.rng.choice(ITEM_IDS)
+                player["items"].append({"itemID": item_id, "displayName": ITEM_NAMES[item_id], "slot": len(player["items"])})
+        if game_time > 90 and self.rng.random() < 0.3:
+            killer, victim = self.rng.sample(range(10), 2)
+            self.players[killer]["scores"]["kills"] += 1
+            self.players[victim]["scores"]["deaths"] += 1
+            self.events.append({
+                "EventID": len(self.events),
+                "EventName": "ChampionKill",
+                "EventTime": float(game_time),
+                "KillerName": self.players[killer]["riotIdGameName"],
+                "VictimName": self.players[victim]["riotIdGameName"],
+                "Assisters": [],
+            })
+        if game_time > 600 and self.rng.random() < 0.05:
+            killer = self.rng.randrange(10)
+            self.events.append({
+                "EventID": len(self.events),
+                "EventName": "TurretKill",
+                "EventTime": float(game_time),
+                "KillerName": self.players[killer]["riotIdGameName"],
+                "TurretKilled": "Turret_T2_C_05_A",
+                "Assisters": [],
+            })
+
+    def snapshot(self, game_time):
+        active = self.players[0]
+        # Deep copy so callers never see a later step mutate the response
+        return json.loads(json.dumps({
+            "activePlayer": {"summonerName": active["summonerName"], "riotId": active["riotId"], "level": active["level"]},
+            "allPlayers": self.players,
+            "events": {"Events": self.events},
+            "gameData": {"gameMode": "CLASSIC", "gameTime": game_time},
+        }))
+
+class RecordedGame:
+    """Replays recorded allgamedata snapshots, one every POLL_SECONDS of real time, then holds the last."""
+
+    POLL_SECONDS = 1
+
+    def __init__(self, path):
+        with open(path, "r") as f:
+            self.snapshots = json.load(f)
+        self.started = time.monotonic()
+
+    def advance(self):
+        index = min(int((time.monotonic() - self.started) / self.POLL_SECONDS), len(self.snapshots) - 1)
+        return self.snapshots[index]
+
+game = SyntheticGame()
+
+@app.route("/liveclientdata/allgamedata", methods=["GET"])
+def allgamedata():
+  return jsonify(game.advance())
+
+if __name__ == "__main__":
+  if len(sys.argv) > 1:
+    game = RecordedGame(sys.argv[1])
+  app.run(host="127.0.0.1", port=PORT, threaded=True)
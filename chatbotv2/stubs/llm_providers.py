@@ -0,0 +1,66 @@
+import time
+import uuid
+from flask import Flask, jsonify, request
+
+# Stand-in for the cloud LLMs behind server_llm.py's /league-game. Run server_llm.py with
+#   GEMINI_BASE_URL=http://127.0.0.1:5014
+#   OPENAI_BASE_URL=http://127.0.0.1:5014/v1
+#   ANTHROPIC_BASE_URL=http://127.0.0.1:5014
+app = Flask(__name__)
+PORT = 5014
+
+# Roughly how long a short cloud completion takes
+LATENCY_SECONDS = 0.8
+
+ADVICE = "Group with your team for the next dragon and ward the river before it spawns."
+
+@app.before_request
+def simulate_latency():
+  time.sleep(LATENCY_SECONDS)
+
+@app.route("/v1beta/models/<path:model_action>", methods=["POST"])
+def gemini(model_action):
+  if not model_action.endswith(":generateContent"):
+    return jsonify({"error": {"code": 404, "message": "not found"}}), 404
+  return jsonify({
+      "candidates": [{"content": {"parts": [{"text": ADVICE}], "role": "model"}, "finishReason": "STOP", "index": 0}],
+      "modelVersion": model_action.split(":")[0],
+  })
+
+@app.route("/v1/responses", methods=["POST"])
+def openai_responses():
+  body = request.get_json(silent=True) or {}
+  return jsonify({
+      "id": f"resp_{uuid.uuid4().hex}",
+      "object": "response",
+      "created_at": int(time.time()),
+      "model": body.get("model", "stub"),
+      "status": "completed",
+      "output": [{
+          "type": "message",
+          "id": f"msg_{uuid.uuid4().hex}",
+          "role": "assistant",
+          "status": "completed",
+          "content": [{"type": "output_text", "text": ADVICE, "annotations": []}],
+      }],
+      "parallel_tool_calls": True,
+      "tool_choice": "auto",
+      "tools": [],
+  })
+
+@app.route("/v1/messages", methods=["POST"])
+def anthropic_messages():
+  body = request.get_json(silent=True) or {}
+  return jsonify({
+      "id": f"msg_{uuid.uuid4().hex}",
+      "type": "message",
+      "role": "assistant",
+      "model": body.get("model", "stub"),
+      "content": [{"type": "text", "text": ADVICE}],
+      "stop_reason": "end_turn",
+      "stop_sequence": None,
+      "usage": {"input_tokens": 100, "output_tokens": 20},
+  })
+
+if __name__ == "__main__":
+  app.run(host="127.0.0.1", port=PORT, threaded=True)
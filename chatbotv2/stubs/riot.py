@@ -0,0 +1,89 @@
+import hashlib
+import random
+import time
+from flask import Flask, jsonify, request
+
+# Stand-in for the Riot account-v1 and match-v5 APIs on americas.api.riotgames.com.
+# Run server_riot.py with RIOT_API_URL=http://127.0.0.1:5012. Every riot ID resolves to a
+# player with a deterministic match history, so repeated runs see the same data.
+app = Flask(__name__)
+PORT = 5012
+
+# Added to every response to stand in for the round trip to Riot
+LATENCY_SECONDS = 0.08
+
+CHAMPIONS = ["Ahri", "Jinx", "LeeSin", "Thresh", "Darius", "Lux", "Zed", "Vi", "Caitlyn", "Ornn", "Ezreal", "Sylas"]
+POSITIONS = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
+HISTORY_LENGTH = 200
+
+def puuid_for(game_name, tag_line):
+  return hashlib.sha256(f"{game_name}#{tag_line}".lower().encode()).hexdigest()
+
+# match ID -> (owner puuid, position in the owner's history), filled in as histories are listed
+MATCH_OWNERS = {}
+
+def match_ids_for(puuid):
+  ids = [f"NA1_{int(puuid[:7], 16) * 1000 + i}" for i in range(HISTORY_LENGTH)]
+  for i, match_id in enumerate(ids):
+    MATCH_OWNERS[match_id] = (puuid, i)
+  return ids
+
+def build_match(match_id):
+  rng = random.Random(match_id)
+  owner, age = MATCH_OWNERS.get(match_id, (None, 0))
+  owner_slot = rng.randrange(10)
+  duration = rng.randint(1200, 2400)
+  # Newest first, one game every couple of hours
+  start = 1_780_000_000_000 - age * 7_200_000
+  participants = []
+  for i in range(10):
+    kills, deaths = rng.randint(0, 15), rng.randint(0, 12)
+    participants.append({
+        "puuid": owner if owner and i == owner_slot else hashlib.sha256(f"{match_id}-{i}".encode()).hexdigest(),
+        "riotIdGameName": f"Stub{rng.randint(1, 9999)}",
+        "riotIdTagline": "STUB",
+        "championName": rng.choice(CHAMPIONS),
+        "teamId": 100 if i < 5 else 200,
+        "teamPosition": POSITIONS[i % 5],
+        "individualPosition": POSITIONS[i % 5] if rng.random() < 0.8 else rng.choice(POSITIONS),
+        "win": (i < 5) == (rng.random() < 0.5),
+        "kills": kills,
+        "deaths": deaths,
+        "assists": rng.randint(0, 20),
+        "totalMinionsKilled": rng.randint(20, 250),
+        "neutralMinionsKilled": rng.randint(0, 150),
+        "goldEarned": rng.randint(6000, 18000),
+        "totalDamageDealtToChampions": rng.randint(5000, 45000),
+    })
+  return {
+      "metadata": {"matchId": match_id, "participants": [p["puuid"] for p in participants]},
+      "info": {
+          "gameId": int(match_id.split("_")[1]),
+          "gameCreation": start,
+          "gameStartTimestamp": start,
+          "gameDuration": duration,
+          "queueId": 420,
+          "participants": participants,
+      },
+  }
+
+@app.before_request
+def simulate_latency():
+  time.sleep(LATENCY_SECONDS)
+
+@app.route("/riot/account/v1/accounts/by-riot-id/<game_name>/<tag_line>", methods=["GET"])
+def account(game_name, tag_line):
+  return jsonify({"puuid": puuid_for(game_name, tag_line), "gameName": game_name, "tagLine": tag_line})
+
+@app.route("/lol/match/v5/matches/by-puuid/<puuid>/ids", methods=["GET"])
+def match_ids(puuid):
+  start = request.args.get("start", 0, type=int)
+  count = min(request.args.get("count", 20, type=int), 100)
+  return jsonify(match_ids_for(puuid)[start:start + count])
+
+@app.route("/lol/match/v5/matches/<match_id>", methods=["GET"])
+def match(match_id):
+  return jsonify(build_match(match_id))
+
+if __name__ == "__main__":
+  app.run(host="127.0.0.1", port=PORT, threaded=True)
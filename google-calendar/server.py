@@ -1,5 +1,9 @@
+import asyncio
 import datetime
 import os.path
+import threading
+from zoneinfo import ZoneInfo
+import httplib2
 from mcp.server.fastmcp import FastMCP # type: ignore
 from mcp.server import Server # type: ignore
 from contextlib import asynccontextmanager
@@ -10,13 +14,19 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build, Resource
 from google.auth.exceptions import RefreshError
+from google_auth_httplib2 import AuthorizedHttp
 
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
 CALENDAR_IDS = ["primary", "lb284rombp29sb39dhbcvcn82c@group.calendar.google.com"]
+TIME_ZONE = ZoneInfo("America/Los_Angeles")
+
+# One authorized connection per worker thread, so keep-alive connections are reused across calls
+thread_http = threading.local()
 
 @dataclass
 class AppContext:
     service: Resource
+    credentials: Credentials
 
 @asynccontextmanager
 async def app_lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
@@ -51,7 +61,7 @@ async def app_lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
         raise Exception("Failed to create Google Calendar service")
     
     try:
-        yield AppContext(service=service)
+        yield AppContext(service=service, credentials=creds)
     finally:
         # Cleanup on shutdown
         print("Goodbye!")
@@ -59,6 +69,28 @@ async def app_lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
 
 mcp = FastMCP("google-calendar", lifespan=app_lifespan)
 
+async def execute(request) -> dict:
+    """Runs a Google API request in a worker thread so it doesn't block the event loop.
+
+    httplib2 connections are not thread-safe, so each worker thread keeps its own authorized connection.
+    """
+    creds = mcp.get_context().request_context.lifespan_context.credentials
+
+    def run() -> dict:
+        http = getattr(thread_http, "http", None)
+        if http is None or http.credentials is not creds:
+            http = thread_http.http = AuthorizedHttp(creds, http=httplib2.Http())
+        return request.execute(http=http)
+
+    return await asyncio.to_thread(run)
+
+def event_start(event: dict) -> datetime.datetime:
+    """Start of an event as an aware datetime; all-day events start at midnight in TIME_ZONE."""
+    start = event["start"]
+    if "dateTime" in start:
+        return datetime.datetime.fromisoformat(start["dateTime"])
+    return datetime.datetime.fromisoformat(start["date"]).replace(tzinfo=TIME_ZONE)
+
 @mcp.tool()
 async def get_my_day(day: str) -> str:
     """Get events for a specific day from primary and shared calendars.
@@ -71,35 +103,25 @@ async def get_my_day(day: str) -> str:
     start_day = datetime.datetime.fromisoformat(day)
     timeMin = start_day.isoformat() + "Z"
     timeMax = (start_day + datetime.timedelta(days=1)).isoformat() + "Z"
-    primary_events, shared_events = [], []
 
     try:
-      primary_events = (
-          service.events()
-          .list(
-              calendarId=CALENDAR_IDS[0],
-              timeMin=timeMin,
-              timeMax=timeMax,
-              singleEvents=True,
-              orderBy="startTime",
+      # Query every calendar at once
+      results = await asyncio.gather(*(
+          execute(
+              service.events().list(
+                  calendarId=calendar_id,
+                  timeMin=timeMin,
+                  timeMax=timeMax,
+                  singleEvents=True,
+                  orderBy="startTime",
+              )
           )
-          .execute()
-      )
-      shared_events = (
-          service.events()
-          .list(
-              calendarId=CALENDAR_IDS[1],
-              timeMin=timeMin,
-              timeMax=timeMax,
-              singleEvents=True,
-              orderBy="startTime",
-          )
-          .execute()
-      )
+          for calendar_id in CALENDAR_IDS
+      ))
     except Exception as e:
         return f"Error fetching events: {str(e)}"
 
-    events = primary_events.get("items", []) + shared_events.get("items", [])
+    events = sorted((event for result in results for event in result.get("items", [])), key=event_start)
 
     if not events:
         return "No events found for today."
@@ -112,6 +134,114 @@ async def get_my_day(day: str) -> str:
 
     return result
 
+def merge_intervals(intervals: list[tuple[datetime.datetime, datetime.datetime]]) -> list[tuple[datetime.datetime, datetime.datetime]]:
+    """Merges overlapping or touching intervals: sort by start, then sweep once extending the last merged interval."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def free_windows(
+    window_start: datetime.datetime,
+    window_end: datetime.datetime,
+    busy: list[tuple[datetime.datetime, datetime.datetime]],
+    duration: datetime.timedelta,
+) -> list[tuple[datetime.datetime, datetime.datetime]]:
+    """Returns the gaps of at least duration between merged busy intervals inside one window."""
+    free = []
+    cursor = window_start
+    for start, end in busy:
+        if end <= cursor:
+            continue
+        if start >= window_end:
+            break
+        if start - cursor >= duration:
+            free.append((cursor, start))
+        cursor = max(cursor, end)
+    if window_end - cursor >= duration:
+        free.append((cursor, window_end))
+    return free
+
+@mcp.tool()
+async def find_free_slots(
+    start_date: str,
+    end_date: str = "",
+    duration_minutes: int = 30,
+    work_start: str = "09:00",
+    work_end: str = "17:00",
+    buffer_minutes: int = 0,
+) -> str:
+    """Finds free windows across the primary and shared calendars, using their busy times (including end times).
+
+    Args:
+      start_date (str): First day to search in YYYY-MM-DD format.
+      end_date (str): Last day to search (inclusive) in YYYY-MM-DD format. Defaults to start_date.
+      duration_minutes (int): Minimum length of a free window.
+      work_start (str): Start of working hours each day, HH:MM in Pacific time.
+      work_end (str): End of working hours each day, HH:MM in Pacific time.
+      buffer_minutes (int): Free time to keep before and after every busy block.
+    """
+    ctx = mcp.get_context()
+    service = ctx.request_context.lifespan_context.service
+
+    try:
+      first_day = datetime.date.fromisoformat(start_date)
+      last_day = datetime.date.fromisoformat(end_date) if end_date else first_day
+      day_start = datetime.time.fromisoformat(work_start)
+      day_end = datetime.time.fromisoformat(work_end)
+    except ValueError as e:
+        return f"Invalid date or time: {str(e)}"
+    if last_day < first_day or day_end <= day_start:
+        return "The end date and end of working hours must come after their starts."
+    if duration_minutes <= 0:
+        return "The duration must be a positive number of minutes."
+    if buffer_minutes < 0:
+        return "The buffer can't be a negative number of minutes."
+
+    time_min = datetime.datetime.combine(first_day, datetime.time.min, TIME_ZONE)
+    time_max = datetime.datetime.combine(last_day + datetime.timedelta(days=1), datetime.time.min, TIME_ZONE)
+
+    try:
+      # One freeBusy call covers every calendar and the whole range
+      freebusy = await execute(service.freebusy().query(body={
+          "timeMin": time_min.isoformat(),
+          "timeMax": time_max.isoformat(),
+          "timeZone": str(TIME_ZONE),
+          "items": [{"id": calendar_id} for calendar_id in CALENDAR_IDS],
+      }))
+    except Exception as e:
+        return f"Error fetching busy times: {str(e)}"
+
+    buffer = datetime.timedelta(minutes=buffer_minutes)
+    busy = []
+    for calendar_id, calendar in freebusy.get("calendars", {}).items():
+        if calendar.get("errors"):
+            return f"Error fetching busy times for {calendar_id}: {calendar['errors']}"
+        for block in calendar.get("busy", []):
+            start = datetime.datetime.fromisoformat(block["start"]).astimezone(TIME_ZONE) - buffer
+            end = datetime.datetime.fromisoformat(block["end"]).astimezone(TIME_ZONE) + buffer
+            busy.append((start, end))
+    busy = merge_intervals(busy)
+
+    duration = datetime.timedelta(minutes=duration_minutes)
+    now = datetime.datetime.now(TIME_ZONE)
+    result = ""
+    day = first_day
+    while day <= last_day:
+        window_start = max(datetime.datetime.combine(day, day_start, TIME_ZONE), now)
+        window_end = datetime.datetime.combine(day, day_end, TIME_ZONE)
+        for start, end in free_windows(window_start, window_end, busy, duration):
+            minutes = int((end - start).total_seconds() // 60)
+            result += f"{day.isoformat()} {day.strftime('%a')} {start.strftime('%H:%M')}-{end.strftime('%H:%M')} ({minutes} min)\n"
+        day += datetime.timedelta(days=1)
+
+    if not result:
+        return f"No free {duration_minutes} minute windows found."
+    return result
+
 @mcp.tool()
 async def create_event(event_title: str, start_time: str, end_time: str, description: str) -> str:
     """Creates an event for a specific day on our shared calendar.
@@ -136,7 +266,7 @@ async def create_event(event_title: str, start_time: str, end_time: str, descrip
       start_field = parse_time_field(start_time)
       end_field = parse_time_field(end_time)
 
-      created_event = (
+      created_event = await execute(
           service.events().insert(
             calendarId=CALENDAR_IDS[1],
             body={
@@ -146,7 +276,6 @@ async def create_event(event_title: str, start_time: str, end_time: str, descrip
               "end": end_field,
             },
           )
-        .execute()
       )
     except Exception as e:
         return f"Error fetching events: {str(e)}"
@@ -160,11 +289,7 @@ async def get_calendars() -> str:
     """Get list of calendars"""
     ctx = mcp.get_context()
     service = ctx.request_context.lifespan_context.service
-    calendars_result = (
-        service.calendarList()
-        .list()
-        .execute()
-    )
+    calendars_result = await execute(service.calendarList().list())
     calendars = calendars_result.get("items", [])
 
     if not calendars:
@@ -183,8 +308,8 @@ async def ten_events() -> str:
     ctx = mcp.get_context()
     service = ctx.request_context.lifespan_context.service
     now = datetime.datetime.utcnow().isoformat() + "Z"
-    events_result = (
-        service.events() 
+    events_result = await execute(
+        service.events()
         .list(
             calendarId="primary",
             timeMin=now,
@@ -192,7 +317,6 @@ async def ten_events() -> str:
             singleEvents=True,
             orderBy="startTime",
         )
-        .execute()
     )
     events = events_result.get("items", [])
 
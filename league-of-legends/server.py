@@ -1,14 +1,227 @@
+import asyncio
 import json
+import os
+import sqlite3
+import time
 import httpx # type: ignore
 from mcp.server.fastmcp import FastMCP # type: ignore
 from mcp.server import Server # type: ignore
 from contextlib import asynccontextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from collections import Counter, deque
 from collections.abc import AsyncIterator
 
+LIVE_CLIENT_URL = "https://127.0.0.1:2999"
+RIOT_REGION_URL = "https://americas.api.riotgames.com"
+
+# The Live Client answers locally, so fail fast when no game is running
+LIVE_CLIENT_TIMEOUT = httpx.Timeout(2.0, connect=1.0)
+RIOT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+RIOT_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+# Retries apply to failed connection attempts only, never to requests the server already received
+CONNECT_RETRIES = 2
+
+# Riot's default application rate limits: (requests, per seconds)
+RIOT_RATE_LIMITS = [(20, 1), (100, 120)]
+# Match detail requests in flight at once, across every tool call
+MATCH_FETCH_CONCURRENCY = 10
+# How many times a request is retried after a 429
+RATE_LIMIT_RETRIES = 3
+
+# Player fields included at each get_current_game_state detail level
+DETAIL_FIELDS = {
+    "summary": ["championName", "position", "kills", "deaths", "level"],
+    "standard": ["championName", "position", "riotId", "kills", "deaths", "cs", "level"],
+    "full": ["championName", "position", "riotId", "kills", "deaths", "cs", "level", "keystone", "items"],
+}
+DETAIL_LEVELS = ["full", "standard", "summary"]
+
+# Projected participant rows for every match downloaded, kept across restarts
+MATCH_STORE_PATH = os.environ.get("MATCH_STORE_PATH", "matches.db")
+# Riot returns at most 100 match IDs per request
+MATCH_ID_PAGE_SIZE = 100
+
+# How long a fetched allgamedata snapshot is reused before the Live Client is asked again
+LIVE_SNAPSHOT_TTL = float(os.environ.get("LIVE_SNAPSHOT_TTL", "1.0"))
+
+class RateLimiter:
+    """Async sliding-window rate limiter shared by every tool invocation in the process.
+
+    Each window allows at most `count` requests in any `seconds` long period. A 429 from Riot
+    pauses every caller until the Retry-After time has passed.
+    """
+
+    def __init__(self, limits: list[tuple[int, float]]):
+        self.windows = [(count, seconds, deque()) for count, seconds in limits]
+        self.pausedUntil = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Callers take turns, so requests go out in the order they asked
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                wait = self.pausedUntil - now
+                for count, seconds, sent in self.windows:
+                    while sent and sent[0] <= now - seconds:
+                        sent.popleft()
+                    if len(sent) >= count:
+                        wait = max(wait, sent[0] + seconds - now)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            for _, _, sent in self.windows:
+                sent.append(now)
+
+    def pause(self, seconds: float):
+        self.pausedUntil = max(self.pausedUntil, time.monotonic() + seconds)
+
+@dataclass
+class LiveSnapshot:
+    """One allgamedata document with its players indexed for direct lookups."""
+    data: dict
+    fetchedAt: float
+    byChampion: dict[str, dict]
+    byRiotId: dict[str, dict]
+    byTeam: dict[str, list[dict]]
+    byTeamPosition: dict[tuple[str, str], dict]
+
+    @classmethod
+    def build(cls, data: dict) -> "LiveSnapshot":
+        players = data.get("allPlayers", []) if data else []
+        byTeam = {}
+        byTeamPosition = {}
+        for p in players:
+            byTeam.setdefault(p.get("team"), []).append(p)
+            # Keep the first player when positions repeat, e.g. modes where every position is empty
+            byTeamPosition.setdefault((p.get("team"), p.get("position", "")), p)
+        return cls(
+            data=data,
+            fetchedAt=time.monotonic(),
+            byChampion={p.get("championName", ""): p for p in players},
+            byRiotId={p.get("riotId", ""): p for p in players},
+            byTeam=byTeam,
+            byTeamPosition=byTeamPosition,
+        )
+
+    def enemyTeam(self, team: str) -> str | None:
+        return next((t for t in self.byTeam if t != team), None)
+
+class LiveSnapshotCache:
+    """Caches the Live Client's allgamedata for a short TTL.
+
+    Callers that arrive while a fetch is in flight wait for that fetch instead of sending their own.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, ttl: float):
+        self.client = client
+        self.ttl = ttl
+        self.snapshot: LiveSnapshot | None = None
+        self.inflight: asyncio.Task | None = None
+
+    async def get(self) -> LiveSnapshot:
+        if self.snapshot and time.monotonic() - self.snapshot.fetchedAt < self.ttl:
+            return self.snapshot
+        if self.inflight is None:
+            self.inflight = asyncio.create_task(self._fetch())
+        task = self.inflight
+        # Shield the shared fetch so one caller being cancelled does not cancel it for everyone
+        return await asyncio.shield(task)
+
+    async def _fetch(self) -> LiveSnapshot:
+        try:
+            resp = await self.client.get("/liveclientdata/allgamedata")
+            self.snapshot = LiveSnapshot.build(resp.json())
+            return self.snapshot
+        finally:
+            self.inflight = None
+
+class MatchStore:
+    """SQLite store holding only the participant fields the tools use, one row per player per match.
+
+    Full match documents are tens of kilobytes each; the projected rows for a match are a few hundred bytes,
+    so hundreds of matches per player stay cheap to keep and to query.
+    """
+
+    FIELDS = ["matchId", "puuid", "championName", "position", "win", "kills", "deaths", "assists", "cs", "durationSeconds", "startedAt"]
+
+    def __init__(self, path: str):
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS participants (
+                matchId TEXT NOT NULL,
+                puuid TEXT NOT NULL,
+                championName TEXT,
+                position TEXT,
+                win INTEGER,
+                kills INTEGER,
+                deaths INTEGER,
+                assists INTEGER,
+                cs INTEGER,
+                durationSeconds INTEGER,
+                startedAt INTEGER,
+                PRIMARY KEY (matchId, puuid)
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS participants_by_player ON participants (puuid, startedAt)")
+        self.db.commit()
+
+    def get(self, match_id: str) -> list[dict] | None:
+        rows = self.db.execute("SELECT * FROM participants WHERE matchId = ?", (match_id,)).fetchall()
+        return [dict(row) for row in rows] or None
+
+    def add(self, match: dict) -> list[dict]:
+        """Projects a full match document down to participant rows and stores them."""
+        info = match['info']
+        rows = [{
+            "matchId": match['metadata']['matchId'],
+            "puuid": p['puuid'],
+            "championName": p['championName'],
+            "position": p['individualPosition'],
+            "win": int(p['win']),
+            "kills": p['kills'],
+            "deaths": p['deaths'],
+            "assists": p['assists'],
+            "cs": p.get('totalMinionsKilled', 0) + p.get('neutralMinionsKilled', 0),
+            "durationSeconds": info['gameDuration'],
+            "startedAt": info['gameStartTimestamp'],
+        } for p in info['participants']]
+        self.db.executemany(
+            f"INSERT OR REPLACE INTO participants VALUES ({', '.join('?' for _ in self.FIELDS)})",
+            [[row[name] for name in self.FIELDS] for row in rows],
+        )
+        self.db.commit()
+        return rows
+
+    def playerHistory(self, puuid: str, match_ids: list[str]) -> list[dict]:
+        """Returns the player's rows for the given matches, newest first."""
+        rows = []
+        # Stay under SQLite's limit on bound parameters
+        for offset in range(0, len(match_ids), 500):
+            chunk = match_ids[offset:offset + 500]
+            rows += self.db.execute(
+                f"SELECT * FROM participants WHERE puuid = ? AND matchId IN ({', '.join('?' for _ in chunk)})",
+                [puuid, *chunk],
+            ).fetchall()
+        return sorted((dict(row) for row in rows), key=lambda row: row["startedAt"], reverse=True)
+
 @dataclass
 class AppContext:
    apiKey: str
+   liveClient: httpx.AsyncClient
+   riotClient: httpx.AsyncClient
+   riotRateLimiter: RateLimiter
+   liveSnapshots: LiveSnapshotCache
+   riotSemaphore: asyncio.Semaphore
+   matchStore: MatchStore
+   # Downloads in progress, keyed by match ID, so players who share a match wait on a single download.
+   # Finished matches never change, and are read back from matchStore.
+   matchCache: dict[str, asyncio.Task] = field(default_factory=dict)
+   puuidCache: dict[str, str] = field(default_factory=dict)
+   # Player info returned by the last get_current_game_state call, keyed by riot ID, for delta mode
+   previousGameState: dict[str, dict] = field(default_factory=dict)
+   previousGameTime: float = 0.0
 
 @asynccontextmanager
 async def app_lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
@@ -16,11 +229,157 @@ async def app_lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
       data = json.load(f)
       api_key = data.get("riotApiKey", "")
 
-    ctx = AppContext(apiKey=api_key)
-    yield ctx
+    # Long-lived pooled clients shared by every tool, so TLS and connection setup happen once
+    live_client = httpx.AsyncClient(
+        base_url=LIVE_CLIENT_URL,
+        verify=False,
+        timeout=LIVE_CLIENT_TIMEOUT,
+        transport=httpx.AsyncHTTPTransport(verify=False, retries=CONNECT_RETRIES),
+    )
+    riot_client = httpx.AsyncClient(
+        base_url=RIOT_REGION_URL,
+        headers={"X-Riot-Token": api_key},
+        timeout=RIOT_TIMEOUT,
+        transport=httpx.AsyncHTTPTransport(http2=True, limits=RIOT_LIMITS, retries=CONNECT_RETRIES),
+    )
+
+    async with live_client, riot_client:
+      ctx = AppContext(apiKey=api_key, liveClient=live_client, riotClient=riot_client, riotRateLimiter=RateLimiter(RIOT_RATE_LIMITS), liveSnapshots=LiveSnapshotCache(live_client, LIVE_SNAPSHOT_TTL), riotSemaphore=asyncio.Semaphore(MATCH_FETCH_CONCURRENCY), matchStore=MatchStore(MATCH_STORE_PATH))
+      yield ctx
 
 mcp = FastMCP("league of legends", lifespan=app_lifespan)
 
+def getAppContext() -> AppContext:
+    return mcp.get_context().request_context.lifespan_context
+
+async def riotGet(path: str, params: dict | None = None) -> httpx.Response:
+    """GETs a Riot API path within the application rate limits, retrying after a 429."""
+    ctx = getAppContext()
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        await ctx.riotRateLimiter.acquire()
+        resp = await ctx.riotClient.get(path, params=params)
+        if resp.status_code != 429 or attempt == RATE_LIMIT_RETRIES:
+            return resp
+        ctx.riotRateLimiter.pause(float(resp.headers.get("Retry-After", 1)))
+    return resp
+
+async def getPuuid(riotId: str) -> str:
+    """Resolves a gameName#tagLine Riot ID to a PUUID, remembering the answer."""
+    ctx = getAppContext()
+    if riotId not in ctx.puuidCache:
+        gameName, tagLine = riotId.split("#", 1)
+        resp = await riotGet(f'/riot/account/v1/accounts/by-riot-id/{gameName}/{tagLine}')
+        if resp.status_code != 200:
+            raise ValueError(f"Could not resolve {riotId}: {resp.status_code}")
+        ctx.puuidCache[riotId] = resp.json()['puuid']
+    return ctx.puuidCache[riotId]
+
+async def getMatchIds(puuid: str, count: int = 10) -> list[str]:
+    """Returns the player's most recent match IDs, newest first, paging through as many requests as needed."""
+    match_ids = []
+    while len(match_ids) < count:
+        page_size = min(MATCH_ID_PAGE_SIZE, count - len(match_ids))
+        resp = await riotGet(f'/lol/match/v5/matches/by-puuid/{puuid}/ids', params={"start": len(match_ids), "count": page_size})
+        if resp.status_code != 200:
+            raise ValueError(f"Failed to fetch match history: {resp.status_code}")
+        page = resp.json()
+        match_ids += page
+        if len(page) < page_size:
+            break
+    return match_ids
+
+async def getMatch(match_id: str) -> list[dict] | None:
+    """Returns the match's participant rows, or None if the match could not be fetched.
+
+    Matches already stored, or being downloaded for another player, are not downloaded again.
+    """
+    ctx = getAppContext()
+    rows = ctx.matchStore.get(match_id)
+    if rows:
+        return rows
+    task = ctx.matchCache.get(match_id)
+    if task is None:
+        task = asyncio.create_task(fetchMatch(ctx, match_id))
+        ctx.matchCache[match_id] = task
+    # A cancelled tool call must not cancel a download other callers are waiting on
+    return await asyncio.shield(task)
+
+async def fetchMatch(ctx: AppContext, match_id: str) -> list[dict] | None:
+    try:
+        async with ctx.riotSemaphore:
+            resp = await riotGet(f'/lol/match/v5/matches/{match_id}')
+        if resp.status_code != 200:
+            return None
+        return ctx.matchStore.add(resp.json())
+    except httpx.RequestError:
+        return None
+    finally:
+        ctx.matchCache.pop(match_id, None)
+
+def summarizeMatches(puuid: str, matches: list[list[dict] | None]) -> dict:
+    """Counts wins, losses, positions and champions for one player across their matches."""
+    wins = 0
+    losses = 0
+    positions = Counter()
+    champions = Counter()
+    for match in matches:
+      if not match:
+        continue
+      player = next((p for p in match if p['puuid'] == puuid), None)
+      if player:
+        if player['win']:
+          wins += 1
+        else:
+          losses += 1
+        positions[player["position"]] += 1
+        champions[player["championName"]] += 1
+    return {"wins": wins, "losses": losses, "positions": positions, "champions": champions}
+
+def kda(rows: list[dict]) -> float:
+    return sum(r["kills"] + r["assists"] for r in rows) / max(1, sum(r["deaths"] for r in rows))
+
+def csPerMinute(rows: list[dict]) -> float:
+    return sum(r["cs"] for r in rows) / max(1, sum(r["durationSeconds"] for r in rows) / 60)
+
+def winRate(rows: list[dict]) -> str:
+    return f"{sum(r['win'] for r in rows) / len(rows):.0%}"
+
+def analyzeHistory(rows: list[dict], trendWindow: int = 10) -> dict:
+    """Computes champion pool, per-role win rates, KDA/CS trends and streaks from a player's rows, newest first."""
+    byChampion = {}
+    byRole = {}
+    for row in rows:
+        byChampion.setdefault(row["championName"], []).append(row)
+        byRole.setdefault(row["position"], []).append(row)
+
+    # Current streak counts back from the newest game, longest streak is over the whole window
+    current = 0
+    for row in rows:
+        if row["win"] != rows[0]["win"]:
+            break
+        current += 1
+    longestWin = longestLoss = run = 0
+    for i, row in enumerate(rows):
+        run = run + 1 if i and row["win"] == rows[i - 1]["win"] else 1
+        if row["win"]:
+            longestWin = max(longestWin, run)
+        else:
+            longestLoss = max(longestLoss, run)
+
+    # Trend windows run from oldest to newest
+    windows = [rows[i:i + trendWindow] for i in range(0, len(rows), trendWindow)][::-1]
+
+    return {
+        "games": len(rows),
+        "winRate": winRate(rows),
+        "champions": sorted(byChampion.items(), key=lambda item: len(item[1]), reverse=True),
+        "roles": sorted(byRole.items(), key=lambda item: len(item[1]), reverse=True),
+        "currentStreak": f"{current}{'W' if rows[0]['win'] else 'L'}",
+        "longestWinStreak": longestWin,
+        "longestLossStreak": longestLoss,
+        "trend": [(len(w), winRate(w), kda(w), csPerMinute(w)) for w in windows],
+    }
+
 # HELPER FUNCTION to get information about a player
 def getPlayerInfo(playerInfo: dict) -> dict:
     """Extracts relevant player information from the playerInfo dictionary."""
@@ -47,17 +406,13 @@ async def get_items(championName: str) -> str:
       championName (str): The name of the champion.
   """
 
-  url = "https://127.0.0.1:2999/liveclientdata/allgamedata"
-
   try:
-    async with httpx.AsyncClient(verify=False) as client:
-        resp = await client.get(url)
-        data = resp.json()
+    snapshot = await getAppContext().liveSnapshots.get()
 
-    if not data:
+    if not snapshot.data:
         return "No data found"
     
-    currPlayer = next((p for p in data.get("allPlayers", []) if p.get("championName", "") == championName), None)
+    currPlayer = snapshot.byChampion.get(championName)
     if not currPlayer:
         return f"{championName} not found in the game."
     items = currPlayer.get("items", [])
@@ -76,87 +431,237 @@ async def lookup_summoner(riotId: str) -> str:
 
   try:
     gameName, tagLine = riotId.split("#", 1)
-    ctx = mcp.get_context()
-    apiKey = ctx.request_context.lifespan_context.apiKey
-
-    get_puuid_url = f'https://americas.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{gameName}/{tagLine}?api_key={apiKey}'
-    async with httpx.AsyncClient() as client:
-        puuid_resp = await client.get(get_puuid_url)
-        puuid_data = puuid_resp.json()
-        puuid = puuid_data['puuid']
-
-
-    match_history_url = f'https://americas.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?start=0&count=10&api_key={apiKey}'
-    async with httpx.AsyncClient() as client:
-        match_history_resp = await client.get(match_history_url)
-        match_history_data = match_history_resp.json()
-
-    match_details = []
-    async with httpx.AsyncClient() as client:
-      for match_id in match_history_data:
-        match_url = f'https://americas.api.riotgames.com/lol/match/v5/matches/{match_id}?api_key={apiKey}'
-        match_resp = await client.get(match_url)
-        if match_resp.status_code == 200:
-          match_details.append(match_resp.json())
-        else:
-          match_details.append({"matchId": match_id, "error": f"Failed to fetch match details: {match_resp.status_code}"})
 
-    wins = 0
-    losses = 0
-    positions = {}
-    for match in match_details:
-      participants = match['info']['participants']
-      player = next((p for p in participants if p['puuid'] == puuid), None)
-      if player:
-        win = player['win']
-        if win:
-          wins += 1
-        else:
-          losses += 1
-        
-        pos = player["individualPosition"]
-        if pos not in positions:
-          positions[pos] = 0
-        positions[pos] += 1
-    return f"{gameName} ({tagLine}) has played {len(match_details)} matches in the last 10 games with {wins} wins and {losses} losses. They played in the following positions: {', '.join([f'{pos}: {count}' for pos, count in positions.items()])}."
+    puuid = await getPuuid(riotId)
+    match_history_data = await getMatchIds(puuid)
+
+    # Fetch the match details concurrently, reusing any already downloaded
+    match_details = await asyncio.gather(*(getMatch(match_id) for match_id in match_history_data))
+
+    summary = summarizeMatches(puuid, match_details)
+    positions = summary["positions"]
+    return f"{gameName} ({tagLine}) has played {len(match_details)} matches in the last 10 games with {summary['wins']} wins and {summary['losses']} losses. They played in the following positions: {', '.join([f'{pos}: {count}' for pos, count in positions.items()])}."
+  except ValueError as e:
+    return str(e)
   except httpx.RequestError as e:
     return f"An error occurred while making the request: {e}"
 
 @mcp.tool()
-async def get_current_game_state() -> str:
+async def scout_lobby(matchCount: int = 10) -> str:
+  """Scouts every player in the current game from their recent match history.
+  Returns one row per player with their win rate, main role (and whether they are playing it now) and champion pool.
+  Args:
+      matchCount (int): How many recent matches to look at per player.
+  """
+
+  try:
+    snapshot = await getAppContext().liveSnapshots.get()
+    if not snapshot.data:
+        return "No data found"
+
+    async def scout(player):
+      puuid = await getPuuid(player.get("riotId", ""))
+      match_ids = await getMatchIds(puuid, matchCount)
+      matches = await asyncio.gather(*(getMatch(match_id) for match_id in match_ids))
+      return summarizeMatches(puuid, matches)
+
+    players = snapshot.data.get("allPlayers", [])
+    # Every player is resolved at once, and matches they share are downloaded only once
+    summaries = await asyncio.gather(*(scout(p) for p in players), return_exceptions=True)
+
+    rows = ["Team | Player | Champion | Position | Games | Win rate | Main role | On main role | Champion pool"]
+    for player, summary in zip(players, summaries):
+      prefix = f"{player.get('team')} | {player.get('riotId')} | {player.get('championName')} | {player.get('position') or '-'}"
+      if isinstance(summary, Exception):
+        rows.append(f"{prefix} | unavailable ({summary})")
+        continue
+      games = summary["wins"] + summary["losses"]
+      if not games:
+        rows.append(f"{prefix} | 0 | - | - | - | -")
+        continue
+      mainRole = summary["positions"].most_common(1)[0][0]
+      onMainRole = "yes" if mainRole == player.get("position") else "no"
+      pool = ", ".join(f"{champion} ({count})" for champion, count in summary["champions"].most_common(3))
+      rows.append(f"{prefix} | {games} | {summary['wins'] / games:.0%} | {mainRole} | {onMainRole} | {pool}")
+    return "\n".join(rows)
+
+  except httpx.RequestError as e:
+    return f"An error occurred while making the request: {e}"
+
+@mcp.tool()
+async def analyze_match_history(riotId: str, matchCount: int = 100) -> str:
+  """Analyzes a summoner's deeper match history: champion pool, win rate per role, KDA and CS per minute trends, and streaks.
+  Matches are stored locally after the first download, so repeat analyses only fetch new games.
+  Args:
+      riotId (str): The Riot ID of the summoner (gameName#tag).
+      matchCount (int): How many recent matches to analyze.
+  """
+
+  try:
+    puuid = await getPuuid(riotId)
+    match_ids = await getMatchIds(puuid, matchCount)
+    # Only matches missing from the store are downloaded
+    await asyncio.gather(*(getMatch(match_id) for match_id in match_ids))
+    rows = getAppContext().matchStore.playerHistory(puuid, match_ids)
+    if not rows:
+        return f"No matches found for {riotId}."
+
+    stats = analyzeHistory(rows)
+    champions = "; ".join(
+        f"{champion} {len(games)} games, {winRate(games)} WR, {kda(games):.2f} KDA, {csPerMinute(games):.1f} CS/min"
+        for champion, games in stats["champions"][:8]
+    )
+    roles = "; ".join(f"{role or 'NONE'} {len(games)} games, {winRate(games)} WR" for role, games in stats["roles"])
+    trend = " -> ".join(f"[{count} games: {wr} WR, {k:.2f} KDA, {cs:.1f} CS/min]" for count, wr, k, cs in stats["trend"])
+
+    return (
+        f"{riotId} over their last {stats['games']} matches: {stats['winRate']} win rate. "
+        f"Current streak: {stats['currentStreak']} (longest win streak {stats['longestWinStreak']}, longest loss streak {stats['longestLossStreak']}). "
+        f"Champion pool: {champions}. "
+        f"By role: {roles}. "
+        f"Form from oldest to newest: {trend}."
+    )
+  except ValueError as e:
+    return str(e)
+  except httpx.RequestError as e:
+    return f"An error occurred while making the request: {e}"
+
+def describePlayer(p: dict, fields: list[str]) -> str:
+    """Formats one player like the original sentence form, leaving out fields not requested or not present."""
+    shown = {f for f in fields if f in p}
+    parts = [p['championName']]
+    if "position" in shown:
+        parts[0] += ' - ' + p['position']
+    if "riotId" in shown:
+        parts.append('(' + p['riotId'] + ')')
+    if "kills" in shown or "deaths" in shown:
+        parts.append('[' + str(p.get('kills', '?')) + 'K/' + str(p.get('deaths', '?')) + 'D]')
+    if "cs" in shown:
+        parts.append('[CS ' + str(p['cs']) + ']')
+    if "level" in shown:
+        parts.append('[Level ' + str(p['level']) + ']')
+    if "keystone" in shown:
+        parts.append('[Keystone: ' + str(p['keystone']) + ']')
+    if "items" in shown:
+        parts.append('[Items: ' + str(p['items']) + ']')
+    return ' '.join(parts)
+
+def renderGameState(riotId: str, me: dict, allies: list[dict], enemies: list[dict], gameTime: float, fields: list[str], format: str, omitted: int = 0) -> str:
+    """Renders the game state as sentences ("text"), one row per player ("table") or "json".
+
+    omitted is how many trailing players were dropped to fit maxChars; json and table output mark it.
+    """
+    if format == "json":
+        state = {
+            "me": {"riotId": riotId, "championName": me["championName"]},
+            "gameTime": round(gameTime),
+            "allies": [{k: v for k, v in p.items() if k in fields} for p in allies],
+            "enemies": [{k: v for k, v in p.items() if k in fields} for p in enemies],
+        }
+        if omitted:
+            state["truncated"] = True
+            state["omittedPlayers"] = omitted
+        return json.dumps(state, separators=(",", ":"))
+
+    if format == "table":
+        rows = [f"me={riotId} ({me['championName']}) t={round(gameTime)}s", "team|" + "|".join(fields)]
+        for team, players in (("ally", allies), ("enemy", enemies)):
+            for p in players:
+                rows.append(team + "|" + "|".join(str(p.get(f, "")) for f in fields))
+        if omitted:
+            rows.append(f"truncated|{omitted} players omitted")
+        return "\n".join(rows)
+
+    # In delta mode a team can have no changes at all
+    teammateInfo = f"My team comp is: {', '.join(describePlayer(p, fields) for p in allies)}." if allies else "No changes on my team."
+    opponentInfo = f"Enemy team comp is: {', '.join(describePlayer(p, fields) for p in enemies)}." if enemies else "No changes on the enemy team."
+    return f"I am {riotId}, playing as {me['championName']}. {teammateInfo} {opponentInfo} It is {gameTime} seconds into the game."
+
+def changedFields(players: list[dict], previous: dict[str, dict], fields: list[str]) -> list[dict]:
+    """Keeps only the players, and the given fields, that differ from the previous call. Champion name is kept to identify the player."""
+    changed = []
+    for p in players:
+        before = previous.get(p["riotId"], {})
+        diff = {k: p.get(k) for k in fields if before.get(k) != p.get(k)}
+        if diff:
+            changed.append({"championName": p["championName"], **diff})
+    return changed
+
+@mcp.tool()
+async def get_current_game_state(detail: str = "full", format: str = "text", maxChars: int = 0, delta: bool = False) -> str:
   """Returns a summary of the current League of Legends game.
+  Args:
+      detail (str): "summary" (champion, position, K/D, level), "standard" (adds riot ID and CS) or "full" (adds keystone and items).
+      format (str): "text" for sentences, "table" for one compact row per player, or "json".
+      maxChars (int): If above 0, the detail level is lowered until the result fits in this many characters. Text is then cut; json and table drop trailing players and are marked as truncated.
+      delta (bool): Only include players and fields that changed since the previous call.
   """
 
-  url = "https://127.0.0.1:2999/liveclientdata/allgamedata"
+  if detail not in DETAIL_FIELDS:
+    return f"Unknown detail level '{detail}', expected one of {', '.join(DETAIL_FIELDS)}."
+  if format not in ("text", "table", "json"):
+    return f"Unknown format '{format}', expected text, table or json."
 
   try:
-    async with httpx.AsyncClient(verify=False) as client:
-        resp = await client.get(url)
-        data = resp.json()
+    ctx = getAppContext()
+    snapshot = await ctx.liveSnapshots.get()
+    data = snapshot.data
 
     if not data:
         return "No data found"
     
     riotId = data.get("activePlayer", {}).get("riotId", " UNKNOWN RIOT ID")
-    currPlayer = next((p for p in data.get("allPlayers", []) if p.get("riotId", "") == riotId), None)
+    currPlayer = snapshot.byRiotId.get(riotId)
     if not currPlayer:
         return f"Player with riotId {riotId} not found in the game."
-    currPlayerInfo = getPlayerInfo(currPlayer)
+    team = currPlayer.get("team")
 
-    roleOpponent = next((p for p in data.get("allPlayers", []) if p.get("position", "") == currPlayerInfo['position'] and p.get("team") != currPlayerInfo['team']), None)
+    enemyTeam = snapshot.enemyTeam(team)
+    roleOpponent = snapshot.byTeamPosition.get((enemyTeam, currPlayer.get("position", "")))
     if not roleOpponent:
         return f"Could not find role opponent."
-    oppPlayerInfo = getPlayerInfo(roleOpponent)
-
-    teammates = [getPlayerInfo(p) for p in data.get("allPlayers", []) if p.get("team") == currPlayerInfo['team']]
-    opponents = [getPlayerInfo(p) for p in data.get("allPlayers", []) if p.get("team") != currPlayerInfo['team']]
 
-    teammateInfo = f"My team comp is: {', '.join([p['championName'] + ' - ' + p['position'] + ' (' + p['riotId'] + ') [' + str(p['kills']) + 'K/' + str(p['deaths']) + 'D] [CS ' + str(p['cs']) + '] [Level ' +  str(p['level']) +'] [Keystone: ' + str(p['keystone']) + '] [Items: ' + str(p['items']) + ']'  for p in teammates])}."
-    opponentInfo = f"Enemy team comp is: {', '.join([p['championName'] + ' - ' + p['position'] + ' (' + p['riotId'] + ') [' + str(p['kills']) + 'K/' + str(p['deaths']) + 'D] [CS ' + str(p['cs']) + '] [Level ' +  str(p['level']) +'] [Keystone: ' + str(p['keystone']) + '] [Items: ' + str(p['items']) + ']' for p in opponents])}."
+    # Every player's info is computed exactly once
+    teammates = [getPlayerInfo(p) for p in snapshot.byTeam.get(team, [])]
+    opponents = [getPlayerInfo(p) for p in snapshot.byTeam.get(enemyTeam, [])]
+    currPlayerInfo = next(p for p in teammates if p["riotId"] == riotId)
 
     gameTime = data["gameData"]["gameTime"]
 
-    return f"I am {riotId}, playing as {currPlayerInfo['championName']}. {teammateInfo} {opponentInfo} It is {gameTime} seconds into the game."
+    allies, enemies = teammates, opponents
+    if delta:
+        # A game time earlier than last time means a new game, so everything is new
+        previous = ctx.previousGameState if gameTime >= ctx.previousGameTime else {}
+        # Only the requested detail level's fields count as changes
+        fields = DETAIL_FIELDS[detail]
+        allies, enemies = changedFields(teammates, previous, fields), changedFields(opponents, previous, fields)
+    ctx.previousGameState = {p["riotId"]: p for p in teammates + opponents}
+    ctx.previousGameTime = gameTime
+
+    for level in DETAIL_LEVELS[DETAIL_LEVELS.index(detail):]:
+        levelFields = DETAIL_FIELDS[level]
+        levelAllies, levelEnemies = allies, enemies
+        if delta:
+            # A lower level can hide a player's only changes, don't list them as a bare champion name
+            def hasChanges(p):
+                return any(k in p for k in levelFields if k != "championName")
+            levelAllies, levelEnemies = [p for p in allies if hasChanges(p)], [p for p in enemies if hasChanges(p)]
+        result = renderGameState(riotId, currPlayerInfo, levelAllies, levelEnemies, gameTime, levelFields, format)
+        if maxChars <= 0 or len(result) <= maxChars:
+            return result
+    if format == "text":
+        return result[:max(0, maxChars - 3)] + "..."
+
+    # Cutting json or table output would break its structure, so trailing players are dropped instead
+    omitted = 0
+    while (levelAllies or levelEnemies) and len(result) > maxChars:
+        if levelEnemies:
+            levelEnemies = levelEnemies[:-1]
+        else:
+            levelAllies = levelAllies[:-1]
+        omitted += 1
+        result = renderGameState(riotId, currPlayerInfo, levelAllies, levelEnemies, gameTime, levelFields, format, omitted)
+    return result
   
   except httpx.RequestError as e:
     return f"An error occurred while making the request: {e}"
@@ -1,55 +1,318 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import asyncio
 import json
+import os
+import sqlite3
+import time
 import httpx # type: ignore
+import numpy as np # type: ignore
 from mcp.server.fastmcp import FastMCP # type: ignore
 from mcp.server import Server # type: ignore
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Iterator
 
 token_url = "https://api.ouraring.com/oauth/token"
+usercollection_url = "https://api.ouraring.com/v2/usercollection"
+
+# Synced Oura documents, kept across restarts
+OURA_STORE_PATH = os.environ.get("OURA_STORE_PATH", "oura.db")
+# Refresh the access token this long before it expires
+TOKEN_REFRESH_MARGIN_SECONDS = 5 * 60
+
+# Long ranges are split into shards of this many days, fetched concurrently
+SHARD_DAYS = 30
+FETCH_CONCURRENCY = 4
+OURA_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+OURA_LIMITS = httpx.Limits(max_connections=FETCH_CONCURRENCY * 2, max_keepalive_connections=FETCH_CONCURRENCY)
+
+# Fields kept from each usercollection document; everything else is dropped as pages are parsed
+COLLECTION_FIELDS = {
+    "daily_sleep": ["day", "score", "contributors"],
+    "daily_activity": ["day", "score", "active_calories", "contributors", "resting_time", "sedentary_time", "steps", "total_calories"],
+    "daily_readiness": ["day", "score", "temperature_deviation", "temperature_trend_deviation", "contributors"],
+    "daily_spo2": ["day", "spo2_percentage", "breathing_disturbance_index"],
+    "daily_stress": ["day", "stress_high", "recovery_high", "day_summary"],
+}
+
+# Heart rate comes as 5-minute samples, so fetch it in smaller shards
+HEART_RATE_SHARD_DAYS = 7
+HEART_RATE_SOURCES = ["awake", "rest", "sleep", "session", "live", "workout"]
+# A gap this long between sleep samples starts a new night
+NIGHT_GAP_SECONDS = 3 * 60 * 60
+
+# A range ending more than this many days before the synced range is fetched on its own, untracked,
+# instead of filling the whole gap (e.g. one week of heart rate two years back would otherwise be ~100 shards)
+MAX_BACKFILL_GAP_DAYS = 60
+
+# Oura can revise the last few days after they first sync (late ring uploads, recalculated scores)
+RECHECK_DAYS = 3
+# Recent days are re-checked at most this often
+SYNC_INTERVAL_SECONDS = 15 * 60
+
+class OuraStore:
+    """Local SQLite copy of Oura's daily documents, one row per collection and day.
+
+    For each collection it remembers the range of days already synced, so later syncs only
+    fetch days outside that range plus the most recent RECHECK_DAYS.
+    """
+
+    def __init__(self, path: str):
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                collection TEXT NOT NULL,
+                day TEXT NOT NULL,
+                document TEXT NOT NULL,
+                PRIMARY KEY (collection, day)
+            );
+            CREATE TABLE IF NOT EXISTS heartrate (
+                day TEXT PRIMARY KEY,
+                timestamps BLOB NOT NULL,
+                bpm BLOB NOT NULL,
+                source BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS sync_state (
+                collection TEXT PRIMARY KEY,
+                synced_from TEXT NOT NULL,
+                synced_through TEXT NOT NULL,
+                synced_at REAL NOT NULL
+            );
+        """)
+        self.db.commit()
+        self.locks = {}
+
+    def lock(self, collection: str) -> asyncio.Lock:
+        return self.locks.setdefault(collection, asyncio.Lock())
+
+    def syncState(self, collection: str) -> tuple[str, str, float] | None:
+        return self.db.execute(
+            "SELECT synced_from, synced_through, synced_at FROM sync_state WHERE collection = ?", (collection,)
+        ).fetchone()
+
+    def add(self, collection: str, documents: list[dict]):
+        self.db.executemany(
+            "INSERT OR REPLACE INTO documents VALUES (?, ?, ?)",
+            [(collection, d["day"], json.dumps(d)) for d in documents if d.get("day")],
+        )
+        self.db.commit()
+
+    def markSynced(self, collection: str, synced_from: str, synced_through: str, synced_at: float | None = None):
+        """Records the synced range. synced_at is when recent days were last checked, now unless given."""
+        self.db.execute(
+            "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+            (collection, synced_from, synced_through, time.time() if synced_at is None else synced_at),
+        )
+        self.db.commit()
+
+    def addHeartRate(self, day: str, timestamps: np.ndarray, bpm: np.ndarray, source: np.ndarray):
+        """Replaces one UTC day of heart-rate samples, stored as packed arrays rather than JSON."""
+        self.db.execute(
+            "INSERT OR REPLACE INTO heartrate VALUES (?, ?, ?, ?)",
+            (day, timestamps.astype(np.int64).tobytes(), bpm.astype(np.uint8).tobytes(), source.astype(np.uint8).tobytes()),
+        )
+        self.db.commit()
+
+    def queryHeartRate(self, start_date: str, end_date: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns (unix timestamps, bpm, source codes) for the UTC days from start_date (inclusive) to end_date (exclusive)."""
+        rows = self.db.execute(
+            "SELECT timestamps, bpm, source FROM heartrate WHERE day >= ? AND day < ? ORDER BY day", (start_date, end_date)
+        ).fetchall()
+        if not rows:
+            return np.empty(0, np.int64), np.empty(0, np.uint8), np.empty(0, np.uint8)
+        return (
+            np.concatenate([np.frombuffer(r[0], np.int64) for r in rows]),
+            np.concatenate([np.frombuffer(r[1], np.uint8) for r in rows]),
+            np.concatenate([np.frombuffer(r[2], np.uint8) for r in rows]),
+        )
+
+    def query(self, collection: str, start_date: str, end_date: str) -> Iterator[dict]:
+        """Yields the stored documents from start_date (inclusive) to end_date (exclusive), oldest first."""
+        rows = self.db.execute(
+            "SELECT document FROM documents WHERE collection = ? AND day >= ? AND day < ? ORDER BY day",
+            (collection, start_date, end_date),
+        )
+        for row in rows:
+            yield json.loads(row[0])
 
 @dataclass
 class AppContext:
    clientId: str
    clientSecret: str
    accessToken: str
+   refreshToken: str
+   # Unix time the access token expires at, or 0 if unknown (token.json from before expiry was stored)
+   accessTokenExpiresAt: float
+   tokenLock: asyncio.Lock
+   store: OuraStore
+   client: httpx.AsyncClient
+   fetchSemaphore: asyncio.Semaphore
 
 @asynccontextmanager
 async def app_lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
+    # Startup only reads token.json, the token is refreshed when it is about to expire or is rejected
     with open("token.json", "r") as f:
       data = json.load(f)
-      CLIENT_ID = data.get("CLIENT_ID", "")
-      CLIENT_SECRET = data.get("CLIENT_SECRET", "")
-      ACCESS_TOKEN = data.get("ACCESS_TOKEN", "")
-      REFRESH_TOKEN = data.get("REFRESH_TOKEN", "")
-      new_at = ACCESS_TOKEN
-      new_rt = REFRESH_TOKEN
-
-      # Refresh access token
-      async with httpx.AsyncClient() as client:
+
+    # One pooled client shared by every tool and shard; it verifies TLS since it also carries the client secret and refresh token
+    async with httpx.AsyncClient(timeout=OURA_TIMEOUT, limits=OURA_LIMITS) as client:
+      ctx = AppContext(
+          clientId=data.get("CLIENT_ID", ""),
+          clientSecret=data.get("CLIENT_SECRET", ""),
+          accessToken=data.get("ACCESS_TOKEN", ""),
+          refreshToken=data.get("REFRESH_TOKEN", ""),
+          accessTokenExpiresAt=data.get("ACCESS_TOKEN_EXPIRES_AT", 0),
+          tokenLock=asyncio.Lock(),
+          store=OuraStore(OURA_STORE_PATH),
+          client=client,
+          fetchSemaphore=asyncio.Semaphore(FETCH_CONCURRENCY),
+      )
+      yield ctx
+
+mcp = FastMCP("oura", lifespan=app_lifespan)
+
+async def refreshAccessToken(ctx: AppContext, rejectedToken: str):
+    """Refreshes the access token and saves it to token.json.
+
+    Concurrent callers wait on one refresh; callers whose token was already replaced do nothing.
+    """
+    async with ctx.tokenLock:
+        if ctx.accessToken != rejectedToken:
+            return
         token_data = {
             "grant_type": "refresh_token",
-            "refresh_token": REFRESH_TOKEN,
-            "client_id": CLIENT_ID,
-            "client_secret": CLIENT_SECRET
+            "refresh_token": ctx.refreshToken,
+            "client_id": ctx.clientId,
+            "client_secret": ctx.clientSecret
         }
-        resp = await client.post(token_url, data=token_data)
+        resp = await ctx.client.post(token_url, data=token_data)
         resp.raise_for_status()
         new_tokens = resp.json()
-        new_at = new_tokens["access_token"]
-        new_rt = new_tokens["refresh_token"]
-        
+        ctx.accessToken = new_tokens["access_token"]
+        ctx.refreshToken = new_tokens["refresh_token"]
+        ctx.accessTokenExpiresAt = time.time() + new_tokens["expires_in"] if "expires_in" in new_tokens else 0
+
         # Write the new access and refresh tokens back to token.json
-        data["ACCESS_TOKEN"] = new_at
-        data["REFRESH_TOKEN"] = new_rt
+        with open("token.json", "r") as f:
+            data = json.load(f)
+        data["ACCESS_TOKEN"] = ctx.accessToken
+        data["REFRESH_TOKEN"] = ctx.refreshToken
+        data["ACCESS_TOKEN_EXPIRES_AT"] = ctx.accessTokenExpiresAt
         with open("token.json", "w") as f:
             json.dump(data, f, indent=2)
 
-    ctx = AppContext(clientId=CLIENT_ID, clientSecret=CLIENT_SECRET, accessToken=new_at)
-    yield ctx
-
-mcp = FastMCP("oura", lifespan=app_lifespan)
+async def ouraGet(ctx: AppContext, url: str, params: dict) -> httpx.Response:
+    """GETs an Oura API URL, refreshing the token first if it is about to expire, and once more on a 401."""
+    token = ctx.accessToken
+    if ctx.accessTokenExpiresAt and time.time() > ctx.accessTokenExpiresAt - TOKEN_REFRESH_MARGIN_SECONDS:
+        await refreshAccessToken(ctx, token)
+        token = ctx.accessToken
+    resp = await ctx.client.get(url, params=params, headers={"Authorization": f"Bearer {token}"})
+    if resp.status_code == 401:
+        await refreshAccessToken(ctx, token)
+        resp = await ctx.client.get(url, params=params, headers={"Authorization": f"Bearer {ctx.accessToken}"})
+    return resp
+
+async def iterCollection(ctx: AppContext, collection: str, params: dict, fields: list[str] | None = None) -> AsyncIterator[list[dict]]:
+    """Yields one page at a time from any Oura usercollection endpoint, keeping only the given fields."""
+    while True:
+        resp = await ouraGet(ctx, f"{usercollection_url}/{collection}", params)
+        resp.raise_for_status()
+        data = resp.json()
+        yield [{f: doc.get(f) for f in fields} if fields else doc for doc in data.get("data", [])]
+        next_token = data.get("next_token")
+        if not next_token:
+            break
+        params = {**params, "next_token": next_token}
+
+async def syncShard(ctx: AppContext, collection: str, start_date: str, end_date: str):
+    async with ctx.fetchSemaphore:
+        params = {"start_date": start_date, "end_date": end_date}
+        async for page in iterCollection(ctx, collection, params, COLLECTION_FIELDS.get(collection)):
+            ctx.store.add(collection, page)
+
+async def syncHeartRateShard(ctx: AppContext, collection: str, start_date: str, end_date: str):
+    """Fetches heart-rate samples for whole UTC days and stores each day as packed arrays."""
+    timestamps, bpm, source = [], [], []
+    async with ctx.fetchSemaphore:
+        params = {"start_datetime": f"{start_date}T00:00:00+00:00", "end_datetime": f"{end_date}T00:00:00+00:00"}
+        async for page in iterCollection(ctx, collection, params, ["timestamp", "bpm", "source"]):
+            for sample in page:
+                timestamps.append(datetime.fromisoformat(sample["timestamp"]).timestamp())
+                bpm.append(sample["bpm"])
+                source.append(HEART_RATE_SOURCES.index(sample["source"]) if sample["source"] in HEART_RATE_SOURCES else 255)
+
+    timestamps = np.array(timestamps, np.int64)
+    bpm = np.clip(np.array(bpm), 0, 255).astype(np.uint8)
+    source = np.array(source, np.uint8)
+    order = np.argsort(timestamps, kind="stable")
+    timestamps, bpm, source = timestamps[order], bpm[order], source[order]
+    days = timestamps.astype("datetime64[s]").astype("datetime64[D]")
+    day = date.fromisoformat(start_date)
+    while day < date.fromisoformat(end_date):
+        # Days with no samples are still written so a re-check clears samples Oura has removed
+        mask = days == np.datetime64(day)
+        ctx.store.addHeartRate(day.isoformat(), timestamps[mask], bpm[mask], source[mask])
+        day += timedelta(days=1)
+
+async def syncRange(ctx: AppContext, collection: str, start_date: str, end_date: str, shardDays: int = SHARD_DAYS, shardSync=syncShard):
+    """Fetches a range into the store as shardDays long shards in parallel, each page written as it arrives."""
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    shards = []
+    while start < end:
+        shard_end = min(start + timedelta(days=shardDays), end)
+        shards.append((start.isoformat(), shard_end.isoformat()))
+        start = shard_end
+
+    await asyncio.gather(*(shardSync(ctx, collection, a, b) for a, b in shards))
+
+async def ensureSynced(ctx: AppContext, collection: str, start_date: str, end_date: str, **syncOptions) -> str:
+    """Syncs whatever part of a range the store is missing and returns the range's end, capped at tomorrow.
+
+    Days before the synced range are fetched once, along with the gap up to the synced range, so it stays
+    contiguous. A range more than MAX_BACKFILL_GAP_DAYS before it is fetched by itself instead and not recorded,
+    so asking for it again fetches it again. Days after the synced range, plus the last RECHECK_DAYS
+    of it, are fetched when the range reaches them and they have not been checked for SYNC_INTERVAL_SECONDS.
+    """
+    store = ctx.store
+    # Nothing exists after today, so never count future days as synced
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    end_date = min(end_date, tomorrow)
+    if start_date >= end_date:
+        return end_date
+
+    async with store.lock(collection):
+        state = store.syncState(collection)
+        if state is None:
+            await syncRange(ctx, collection, start_date, end_date, **syncOptions)
+            store.markSynced(collection, start_date, end_date)
+        else:
+            synced_from, synced_through, synced_at = state
+            if start_date < synced_from:
+                if (date.fromisoformat(synced_from) - date.fromisoformat(end_date)).days > MAX_BACKFILL_GAP_DAYS:
+                    # Entirely before the recent days, so there is nothing to re-check either
+                    await syncRange(ctx, collection, start_date, end_date, **syncOptions)
+                    return end_date
+                await syncRange(ctx, collection, start_date, synced_from, **syncOptions)
+                synced_from = start_date
+                # Backfilling does not check recent days, so keep when they were last checked
+                store.markSynced(collection, synced_from, synced_through, synced_at)
+            recheck_from = max(synced_from, (date.fromisoformat(synced_through) - timedelta(days=RECHECK_DAYS)).isoformat())
+            if end_date > recheck_from and (end_date > synced_through or time.time() - synced_at > SYNC_INTERVAL_SECONDS):
+                synced_through = max(end_date, synced_through)
+                await syncRange(ctx, collection, recheck_from, synced_through, **syncOptions)
+                store.markSynced(collection, synced_from, synced_through)
+    return end_date
+
+async def iterDocuments(collection: str, start_date: str, end_date: str) -> AsyncIterator[dict]:
+    """Yields documents from start_date (inclusive) to end_date (exclusive), oldest first, syncing only what the store is missing."""
+    ctx = mcp.get_context().request_context.lifespan_context
+    end_date = await ensureSynced(ctx, collection, start_date, end_date)
+    for doc in ctx.store.query(collection, start_date, end_date):
+        yield doc
+
+async def queryDocuments(collection: str, start_date: str, end_date: str) -> list[dict]:
+    return [doc async for doc in iterDocuments(collection, start_date, end_date)]
 
 @mcp.resource("auth://{code}")
 async def exchange_code_for_token(code: str) -> dict:
@@ -65,9 +328,9 @@ async def exchange_code_for_token(code: str) -> dict:
     """
     redirect_uri = "http://localhost:8080"
 
-    ctx = mcp.get_context()
-    client_id = ctx.request_context.lifespan_context.clientId
-    client_secret = ctx.request_context.lifespan_context.clientSecret
+    ctx = mcp.get_context().request_context.lifespan_context
+    client_id = ctx.clientId
+    client_secret = ctx.clientSecret
 
     data = {
         "grant_type": "authorization_code",
@@ -78,15 +341,39 @@ async def exchange_code_for_token(code: str) -> dict:
     }
 
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(token_url, data=data)
-            resp.raise_for_status()
-            return resp.json()
+        resp = await ctx.client.post(token_url, data=data)
+        resp.raise_for_status()
+        return resp.json()
     except httpx.HTTPStatusError as e:
         return {"error": f"HTTP error: {e.response.status_code}", "detail": e.response.text}
     except Exception as e:
         return {"error": str(e)}
 
+def formatSleepDay(day: dict) -> str:
+    contributors = day.get("contributors") or {}
+    return (
+        f"Date: {day.get('day')}\n"
+        f"  Overall Sleep Score: {day.get('score')}\n"
+        f"  Deep Sleep: {contributors.get('deep_sleep')}\n"
+        f"  Efficiency: {contributors.get('efficiency')}\n"
+        f"  Latency: {contributors.get('latency')}\n"
+        f"  REM Sleep: {contributors.get('rem_sleep')}\n"
+        f"  Restfulness: {contributors.get('restfulness')}\n"
+        f"  Timing: {contributors.get('timing')}\n"
+        f"  Total Sleep: {contributors.get('total_sleep')}\n\n"
+    )
+
+async def collectionDocuments(collection: str, start_date: str, end_date: str) -> str:
+    """Returns a collection's documents for a range as JSON, with only the fields in COLLECTION_FIELDS."""
+    try:
+        fields = COLLECTION_FIELDS[collection]
+        result = [{f: doc.get(f) for f in fields} async for doc in iterDocuments(collection, start_date, end_date)]
+        if not result:
+            return "No data found"
+        return json.dumps(result, indent=2)
+    except httpx.HTTPError as e:
+        return f"An error occurred while making the request: {e}"
+
 @mcp.tool()
 async def get_activity_documents(start_date: str, end_date: str) -> str:
     """Returns activity document for the user from start date (inclusive) to end date (exclusive).
@@ -95,97 +382,45 @@ async def get_activity_documents(start_date: str, end_date: str) -> str:
           start_date (str): The start day to retrieve sleep score. YYYY-MM-DD format.
           end_date (str): The last day to retrieve sleep score. YYYY-MM-DD format.
     """
-
-    base_url = "https://api.ouraring.com/v2/usercollection/daily_activity"
-    params = {
-        "start_date": start_date,
-        "end_date": end_date
-    }
-    result = []
-
-    try:
-        async with httpx.AsyncClient(verify=False) as client:
-            ctx = mcp.get_context()
-            accessToken = ctx.request_context.lifespan_context.accessToken
-            next_token = None
-
-            while True:
-                req_params = params.copy()
-                if next_token:
-                    req_params["next_token"] = next_token
-                resp = await client.get(base_url, params=req_params, headers={"Authorization": f"Bearer {accessToken}"})
-                data = resp.json()
-                items = data.get("data", [])
-                for item in items:
-                    filtered = {
-                        "score": item.get("score"),
-                        "active_calories": item.get("active_calories"),
-                        "contributors": item.get("contributors"),
-                        "resting_time": item.get("resting_time"),
-                        "sedentary_time": item.get("sedentary_time"),
-                        "steps": item.get("steps"),
-                        "total_calories": item.get("total_calories"),
-                        "day": item.get("day")
-                    }
-                    result.append(filtered)
-                next_token = data.get("next_token")
-                if not next_token:
-                    break
-
-        if not result:
-            return "No data found"
-        
-        return json.dumps(result, indent=2)
-
-    except httpx.RequestError as e:
-        return f"An error occurred while making the request: {e}"
+    return await collectionDocuments("daily_activity", start_date, end_date)
 
 @mcp.tool()
 async def get_todays_activity_document() -> str:
     """Returns activity document for the user for today.
        The document includes number of steps taken (steps) and total calories burned (total_calories).
     """
-
-    base_url = "https://api.ouraring.com/v2/usercollection/daily_activity"
     today = datetime.now().date()
-    start_date = today.isoformat()
-    end_date = (today + timedelta(days=1)).isoformat()
-    params = {
-        "start_date": start_date,
-        "end_date": end_date
-    }
-    result = []
-
-    try:
-        async with httpx.AsyncClient(verify=False) as client:
-            ctx = mcp.get_context()
-            accessToken = ctx.request_context.lifespan_context.accessToken
-
-            req_params = params.copy()
-            resp = await client.get(base_url, params=req_params, headers={"Authorization": f"Bearer {accessToken}"})
-            data = resp.json()
-            items = data.get("data", [])
-            for item in items:
-                filtered = {
-                    "score": item.get("score"),
-                    "active_calories": item.get("active_calories"),
-                    "contributors": item.get("contributors"),
-                    "resting_time": item.get("resting_time"),
-                    "sedentary_time": item.get("sedentary_time"),
-                    "steps": item.get("steps"),
-                    "total_calories": item.get("total_calories"),
-                    "day": item.get("day")
-                }
-                result.append(filtered)
+    return await collectionDocuments("daily_activity", today.isoformat(), (today + timedelta(days=1)).isoformat())
 
-        if not result:
-            return "No data found"
-        
-        return json.dumps(result, indent=2)
+@mcp.tool()
+async def get_readiness_documents(start_date: str, end_date: str) -> str:
+    """Returns readiness documents for the user from start date (inclusive) to end date (exclusive).
+       Each includes the readiness score, body temperature deviation and contributors such as HRV balance and recovery index.
+      Args:
+          start_date (str): The first day to retrieve. YYYY-MM-DD format.
+          end_date (str): The day after the last day to retrieve. YYYY-MM-DD format.
+    """
+    return await collectionDocuments("daily_readiness", start_date, end_date)
 
-    except httpx.RequestError as e:
-        return f"An error occurred while making the request: {e}"
+@mcp.tool()
+async def get_spo2_documents(start_date: str, end_date: str) -> str:
+    """Returns blood oxygen documents for the user from start date (inclusive) to end date (exclusive).
+       Each includes the average SpO2 percentage during sleep and the breathing disturbance index.
+      Args:
+          start_date (str): The first day to retrieve. YYYY-MM-DD format.
+          end_date (str): The day after the last day to retrieve. YYYY-MM-DD format.
+    """
+    return await collectionDocuments("daily_spo2", start_date, end_date)
 
+@mcp.tool()
+async def get_stress_documents(start_date: str, end_date: str) -> str:
+    """Returns stress documents for the user from start date (inclusive) to end date (exclusive).
+       Each includes seconds spent in high stress (stress_high) and high recovery (recovery_high), and a day summary.
+      Args:
+          start_date (str): The first day to retrieve. YYYY-MM-DD format.
+          end_date (str): The day after the last day to retrieve. YYYY-MM-DD format.
+    """
+    return await collectionDocuments("daily_stress", start_date, end_date)
 
 @mcp.tool()
 async def get_last_nights_sleep_document() -> str:
@@ -196,21 +431,15 @@ async def get_last_nights_sleep_document() -> str:
   prior_date = (today + timedelta(days=-1)).isoformat()
   start_date = today.isoformat()
   end_date = (today + timedelta(days=1)).isoformat()
-  url = f"https://api.ouraring.com/v2/usercollection/daily_sleep?start_date={start_date}&end_date={end_date}"
 
   try:
-    async with httpx.AsyncClient(verify=False) as client:
-        ctx = mcp.get_context()
-        accessToken = ctx.request_context.lifespan_context.accessToken
-        resp = await client.get(url, headers={"Authorization": f"Bearer {accessToken}"})
-        data = resp.json()
+    day = await anext(iterDocuments("daily_sleep", start_date, end_date), None)
 
-    if not data:
+    if not day:
         return "No data found"
     
-    day = data.get("data")[0]
     overall = day.get("score")    
-    contributors = day.get("contributors", {})
+    contributors = day.get("contributors") or {}
     deep_sleep = contributors.get("deep_sleep")
     efficiency = contributors.get("efficiency")
     latency = contributors.get("latency")
@@ -222,7 +451,7 @@ async def get_last_nights_sleep_document() -> str:
     result = f"Sleep scores for last night (from {prior_date} to {today}). Overall Sleep Score: {overall}\nDeep Sleep: {deep_sleep}\nEfficiency: {efficiency}\nLatency: {latency}\nREM Sleep: {rem_sleep}\nRestfulness: {restfulness}\nTiming: {timing}\nTotal Sleep: {total_sleep}"
     return result
 
-  except httpx.RequestError as e:
+  except httpx.HTTPError as e:
     return f"An error occurred while making the request: {e}"
 
 
@@ -234,56 +463,188 @@ async def get_sleep_documents(start_date: str, end_date: str) -> str:
         end_date (str): The last day to retrieve sleep score. YYYY-MM-DD format.
     """
 
-    base_url = f"https://api.ouraring.com/v2/usercollection/daily_sleep?start_date={start_date}&end_date={end_date}"
-    result = ""
-    next_token = None
     try:
-        async with httpx.AsyncClient(verify=False) as client:
-            ctx = mcp.get_context()
-            accessToken = ctx.request_context.lifespan_context.accessToken
-            url = base_url
-            while True:
-                # Add next_token to the URL if present
-                if next_token:
-                    url_with_token = f"{url}&next_token={next_token}"
-                else:
-                    url_with_token = url
-                resp = await client.get(url_with_token, headers={"Authorization": f"Bearer {accessToken}"})
-                data = resp.json()
-                if not data or "data" not in data or not data["data"]:
-                    if not result:
-                        return "No data found"
-                    break
-                days = data.get("data", [])
-                for day in days:
-                    date_str = day.get("day")
-                    overall = day.get("score")
-                    contributors = day.get("contributors", {})
-                    deep_sleep = contributors.get("deep_sleep")
-                    efficiency = contributors.get("efficiency")
-                    latency = contributors.get("latency")
-                    rem_sleep = contributors.get("rem_sleep")
-                    restfulness = contributors.get("restfulness")
-                    timing = contributors.get("timing")
-                    total_sleep = contributors.get("total_sleep")
-                    result += (
-                        f"Date: {date_str}\n"
-                        f"  Overall Sleep Score: {overall}\n"
-                        f"  Deep Sleep: {deep_sleep}\n"
-                        f"  Efficiency: {efficiency}\n"
-                        f"  Latency: {latency}\n"
-                        f"  REM Sleep: {rem_sleep}\n"
-                        f"  Restfulness: {restfulness}\n"
-                        f"  Timing: {timing}\n"
-                        f"  Total Sleep: {total_sleep}\n\n"
-                    )
-                next_token = data.get("next_token")
-                if not next_token:
-                    break
-        return result
-    except httpx.RequestError as e:
+        # Formatted days are joined once at the end instead of concatenated one by one
+        result = "".join([formatSleepDay(day) async for day in iterDocuments("daily_sleep", start_date, end_date)])
+        return result or "No data found"
+    except httpx.HTTPError as e:
         return f"An error occurred while making the request: {e}"
 
+SLEEP_METRICS = ["score", "deep_sleep", "efficiency", "latency", "rem_sleep", "restfulness", "timing", "total_sleep"]
+ACTIVITY_METRICS = ["score", "steps", "active_calories", "total_calories"]
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+def toColumns(documents: list[dict], days: np.ndarray, metrics: list[str], contributors: bool) -> dict[str, np.ndarray]:
+    """Lays documents out as one float array per metric, aligned to days, with NaN for missing days."""
+    index = {d: i for i, d in enumerate(days.astype(str))}
+    columns = {m: np.full(len(days), np.nan) for m in metrics}
+    for doc in documents:
+        i = index.get(doc.get("day"))
+        if i is None:
+            continue
+        for m in metrics:
+            value = doc.get(m) if m == "score" or not contributors else (doc.get("contributors") or {}).get(m)
+            if value is not None:
+                columns[m][i] = value
+    return columns
+
+def rollingMean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the last `window` days at each day, ignoring missing days."""
+    present = ~np.isnan(values)
+    sums = np.cumsum(np.where(present, values, 0.0))
+    counts = np.cumsum(present)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts[window:] = counts[window:] - counts[:-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+def correlation(x: np.ndarray, y: np.ndarray) -> float | None:
+    both = ~np.isnan(x) & ~np.isnan(y)
+    if both.sum() < 3 or np.std(x[both]) == 0 or np.std(y[both]) == 0:
+        return None
+    return round(float(np.corrcoef(x[both], y[both])[0, 1]), 2)
+
+def summarize(values: np.ndarray, window: int) -> dict | None:
+    present = values[~np.isnan(values)]
+    if not len(present):
+        return None
+    rolling = rollingMean(values, window)
+    p10, p50, p90 = np.percentile(present, [10, 50, 90])
+    summary = {"days": int(len(present)), "mean": round(float(present.mean()), 1), "p10": round(float(p10), 1), "median": round(float(p50), 1), "p90": round(float(p90), 1)}
+    if len(values) >= 2 * window:
+        for label, value in ((f"last_{window}d_avg", rolling[-1]), (f"prior_{window}d_avg", rolling[-1 - window])):
+            summary[label] = None if np.isnan(value) else round(float(value), 1)
+    return summary
+
+@mcp.tool()
+async def analyze_sleep_and_activity(start_date: str, end_date: str, window: int = 7, top_n: int = 5) -> str:
+    """Summarizes sleep and activity trends between start_date (inclusive) and end_date (exclusive) instead of returning every document.
+       Includes mean, percentiles and rolling averages per metric, the best and worst nights by sleep score,
+       day-of-week averages, and correlations between a day's activity and the following night's sleep.
+    Args:
+        start_date (str): The first day to analyze. YYYY-MM-DD format.
+        end_date (str): The day after the last day to analyze. YYYY-MM-DD format.
+        window (int): Days in the rolling average, compared with the window before it.
+        top_n (int): How many best and worst nights to list.
+    """
+
+    try:
+        sleep_docs, activity_docs = await asyncio.gather(
+            queryDocuments("daily_sleep", start_date, end_date),
+            queryDocuments("daily_activity", start_date, end_date),
+        )
+    except httpx.HTTPError as e:
+        return f"An error occurred while making the request: {e}"
+
+    if not sleep_docs and not activity_docs:
+        return "No data found"
+    window = max(1, window)
+
+    days = np.arange(np.datetime64(start_date), np.datetime64(min(end_date, (date.today() + timedelta(days=1)).isoformat())))
+    sleep = toColumns(sleep_docs, days, SLEEP_METRICS, contributors=True)
+    activity = toColumns(activity_docs, days, ACTIVITY_METRICS, contributors=False)
+
+    # A sleep document's day is the morning the night ends, so day i's activity is followed by sleep on day i + 1
+    next_night = {m: np.append(v[1:], np.nan) for m, v in sleep.items()}
+
+    scored = np.flatnonzero(~np.isnan(sleep["score"]))
+    order = scored[np.argsort(sleep["score"][scored], kind="stable")]
+    # Monday is 0; numpy's epoch (1970-01-01) was a Thursday
+    weekday = (days.astype("datetime64[D]").astype(np.int64) + 3) % 7
+
+    def byWeekday(values):
+        return {WEEKDAYS[d]: round(float(np.nanmean(values[weekday == d])), 1) for d in range(7) if (~np.isnan(values[weekday == d])).any()}
+
+    result = {
+        "sleep": {m: summarize(v, window) for m, v in sleep.items()},
+        "activity": {m: summarize(v, window) for m, v in activity.items()},
+        "best_nights": [{"day": str(days[i]), "score": int(sleep["score"][i])} for i in order[::-1][:top_n]],
+        "worst_nights": [{"day": str(days[i]), "score": int(sleep["score"][i])} for i in order[:top_n]],
+        "sleep_score_by_weekday": byWeekday(sleep["score"]),
+        "steps_by_weekday": byWeekday(activity["steps"]),
+        "correlations": {
+            "steps_vs_next_night_sleep_score": correlation(activity["steps"], next_night["score"]),
+            "steps_vs_next_night_deep_sleep": correlation(activity["steps"], next_night["deep_sleep"]),
+            "active_calories_vs_next_night_sleep_score": correlation(activity["active_calories"], next_night["score"]),
+            "activity_score_vs_next_night_restfulness": correlation(activity["score"], next_night["restfulness"]),
+        },
+    }
+    return json.dumps(result, indent=2)
+
+def splitNights(timestamps: np.ndarray) -> list[np.ndarray]:
+    """Splits sorted sleep sample times into nights wherever there is a long gap between samples."""
+    if not len(timestamps):
+        return []
+    breaks = np.flatnonzero(np.diff(timestamps) > NIGHT_GAP_SECONDS) + 1
+    return np.split(np.arange(len(timestamps)), breaks)
+
+@mcp.tool()
+async def get_heart_rate_summary(start_date: str, end_date: str, view: str = "nightly") -> str:
+    """Returns a compact summary of the user's 5-minute heart-rate samples between start_date (inclusive) and end_date (exclusive).
+       The raw samples stay on the server; only aggregates are returned.
+    Args:
+        start_date (str): The first day to summarize. YYYY-MM-DD format.
+        end_date (str): The day after the last day to summarize. YYYY-MM-DD format.
+        view (str): "nightly" for each night's resting (lowest) and average sleeping heart rate, plus the variability of
+            successive samples (RMSSD of bpm, a rough proxy, not true beat-to-beat HRV);
+            "hourly" for min/mean/max by hour of day (local time) across the range;
+            "daily" for min/mean/max per day.
+    """
+
+    if view not in ("nightly", "hourly", "daily"):
+        return f"Unknown view '{view}', expected nightly, hourly or daily."
+
+    try:
+        ctx = mcp.get_context().request_context.lifespan_context
+        end_date = await ensureSynced(ctx, "heartrate", start_date, end_date, shardDays=HEART_RATE_SHARD_DAYS, shardSync=syncHeartRateShard)
+    except httpx.HTTPError as e:
+        return f"An error occurred while making the request: {e}"
+
+    timestamps, bpm, source = ctx.store.queryHeartRate(start_date, end_date)
+    if not len(timestamps):
+        return "No data found"
+    bpm = bpm.astype(np.float64)
+
+    if view == "nightly":
+        asleep = source == HEART_RATE_SOURCES.index("sleep")
+        nights = []
+        for night in splitNights(timestamps[asleep]):
+            values = bpm[asleep][night]
+            ended = datetime.fromtimestamp(int(timestamps[asleep][night[-1]])).date().isoformat()
+            nights.append({
+                "night_ending": ended,
+                "samples": int(len(values)),
+                "resting_hr": int(values.min()),
+                "avg_hr": round(float(values.mean()), 1),
+                "bpm_rmssd": round(float(np.sqrt(np.mean(np.diff(values) ** 2))), 1) if len(values) > 1 else None,
+            })
+        return json.dumps(nights, indent=2) if nights else "No sleep heart-rate samples found"
+
+    if view == "hourly":
+        # The server's current UTC offset stands in for the user's time zone
+        offset = datetime.now().astimezone().utcoffset().total_seconds()
+        groups = ((timestamps + offset) // 3600 % 24).astype(np.int64)
+        labels = [f"{h:02d}:00" for h in range(24)]
+    else:
+        day_index = ((timestamps + datetime.now().astimezone().utcoffset().total_seconds()) // 86400).astype(np.int64)
+        first = day_index.min()
+        groups = day_index - first
+        labels = [str(np.datetime64(int(first + i), "D")) for i in range(int(groups.max()) + 1)]
+
+    # Group aggregates in one pass each instead of looping over samples
+    counts = np.bincount(groups, minlength=len(labels))
+    sums = np.bincount(groups, weights=bpm, minlength=len(labels))
+    mins = np.full(len(labels), np.inf)
+    maxs = np.full(len(labels), -np.inf)
+    np.minimum.at(mins, groups, bpm)
+    np.maximum.at(maxs, groups, bpm)
+
+    rows = [f"{'hour' if view == 'hourly' else 'day'} | min | mean | max | samples"]
+    for i, label in enumerate(labels):
+        if counts[i]:
+            rows.append(f"{label} | {int(mins[i])} | {sums[i] / counts[i]:.0f} | {int(maxs[i])} | {int(counts[i])}")
+    return "\n".join(rows)
+
 if __name__ == "__main__":
     # Initialize and run the server
     mcp.run(transport='stdio')